@@ -5,19 +5,86 @@
 使用PyInstaller将程序打包为可执行文件
 """
 
+import hashlib
 import os
 import sys
 import shutil
 import subprocess
 import platform
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 
-def check_pyinstaller():
+# 参与构建缓存键计算的源文件
+BUILD_KEY_SOURCES = [
+    'cli_main.py',
+    'config.py',
+    'csv_parser.py',
+    'pdf_generator.py',
+    'error_handler.py',
+    'pcb_generator.spec',
+]
+
+
+def _compute_build_key():
+    """
+    计算构建缓存键
+
+    对所有参与打包的源文件内容以及Python/PyInstaller版本做SHA-256哈希。
+    任何一项变化都会产生不同的键，从而触发重新构建。
+
+    Returns:
+        十六进制摘要字符串
+    """
+    h = hashlib.sha256()
+
+    for name in BUILD_KEY_SOURCES:
+        path = Path(name)
+        if path.exists():
+            h.update(name.encode('utf-8'))
+            h.update(path.read_bytes())
+
+    try:
+        import PyInstaller
+        h.update(PyInstaller.__version__.encode('utf-8'))
+    except ImportError:
+        pass
+
+    h.update(sys.version.encode('utf-8'))
+
+    return h.hexdigest()
+
+
+def _find_built_executable():
+    """查找已构建的可执行文件，不存在时返回None"""
+    system = platform.system().lower()
+    if system == 'windows':
+        exe_path = Path('dist') / 'pcb-generator.exe'
+    elif system == 'darwin':
+        exe_path = Path('dist') / 'PCB-Generator.app'
+    else:
+        exe_path = Path('dist') / 'pcb-generator'
+
+    return exe_path if exe_path.exists() else None
+
+
+# PyInstaller版本戳：存在即表示上次检查已通过
+_PYI_STAMP = Path('.build-cache/pyinstaller.version')
+
+
+def check_pyinstaller(recheck=False):
     """检查PyInstaller是否已安装"""
+    # 命中版本戳时跳过导入——导入PyInstaller本身要数百毫秒，
+    # 而它马上就会作为子进程被重新启动
+    if not recheck and _PYI_STAMP.exists():
+        print(f"PyInstaller版本（缓存）: {_PYI_STAMP.read_text().strip()}")
+        return True
+
     try:
         import PyInstaller
         print(f"PyInstaller版本: {PyInstaller.__version__}")
+        _PYI_STAMP.parent.mkdir(exist_ok=True)
+        _PYI_STAMP.write_text(PyInstaller.__version__)
         return True
     except ImportError:
         print("PyInstaller未安装，正在安装...")
@@ -29,128 +96,129 @@ def check_pyinstaller():
             return False
 
 
+def _remove_dir(dir_name):
+    """删除单个目录：先改名再删除，调用方立即拿回目录名"""
+    if not os.path.exists(dir_name):
+        return
+
+    print(f"清理目录: {dir_name}")
+    try:
+        # rename瞬间完成，真正的逐文件unlink在改名后的暂存目录上进行
+        stash = Path(f'.{dir_name}.stash.{os.getpid()}')
+        os.rename(dir_name, stash)
+        shutil.rmtree(stash, ignore_errors=True)
+    except OSError:
+        shutil.rmtree(dir_name, ignore_errors=True)
+
+
 def clean_build_dirs():
     """清理构建目录"""
     dirs_to_clean = ['build', 'dist', '__pycache__']
-    
-    for dir_name in dirs_to_clean:
-        if os.path.exists(dir_name):
-            print(f"清理目录: {dir_name}")
-            shutil.rmtree(dir_name)
-    
+
+    # 各目录树的unlink互不依赖，多线程下内核可以流水线处理
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(_remove_dir, dirs_to_clean))
+
     # 清理.spec文件
     for spec_file in Path('.').glob('*.spec'):
         print(f"删除文件: {spec_file}")
-        spec_file.unlink()
+        spec_file.unlink(missing_ok=True)
+
+
+def _prepare_font_cache():
+    """
+    预生成matplotlib字体缓存
 
+    冻结后的程序首次import matplotlib时，若缓存目录里没有
+    fontlist文件，会扫描系统字体目录重建缓存，耗时1-3秒。
+    构建时预先转储缓存并打进包里，配合runtime_hooks/mpl_cache.py
+    把MPLCONFIGDIR指向它，首启即可直接命中。
 
-def create_spec_file():
-    """创建PyInstaller规格文件"""
+    Returns:
+        缓存文件路径，matplotlib不可用时返回None
+    """
+    try:
+        from matplotlib import font_manager
+    except ImportError:
+        return None
+
+    cache_dir = Path('.build-cache/matplotlib')
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    # 文件名中的版本号必须与运行时matplotlib查找的一致
+    cache_file = cache_dir / f'fontlist-v{font_manager.FontManager.__version__}.json'
+    if not cache_file.exists():
+        font_manager.json_dump(font_manager.fontManager, str(cache_file))
+        print(f"已生成matplotlib字体缓存: {cache_file}")
+
+    return cache_file
+
+
+def create_spec_file(upx=False, strip=False):
+    """
+    创建PyInstaller规格文件
+
+    Args:
+        upx: 是否启用UPX压缩。压缩可减小体积，但每次启动都要
+             额外解压，并且可能导致部分Python 3动态库加载失败，
+             因此默认关闭。若重新启用，建议将matplotlib的
+             _qhull*.pyd和numpy/*.pyd加入upx_exclude。
+        strip: 是否剥离动态库的符号表。剥离可减少10-30%的.so体积
+               和加载I/O，但strip会破坏numpy随附的OpenBLAS
+               （ELF load command对齐被改写，加载直接失败），
+               因此默认关闭，仅在PCB_STRIP_BUILD=1时启用。
+    """
     system = platform.system().lower()
 
+    # Windows没有strip工具链，仅在Linux/macOS上剥离符号
+    if system == 'windows':
+        strip = False
+
     # 确定主入口文件
     main_script = 'cli_main.py'  # 使用命令行版本作为主入口，避免tkinter依赖问题
 
-    spec_content = f'''# -*- mode: python ; coding: utf-8 -*-
-
-block_cipher = None
-
-a = Analysis(
-    ['{main_script}'],
-    pathex=[],
-    binaries=[],
-    datas=[
-        ('config.py', '.'),
-        ('README.md', '.'),
-    ],
-    hiddenimports=[
-        'matplotlib.backends.backend_pdf',
-        'matplotlib.backends.backend_agg',
-        'matplotlib.figure',
-        'matplotlib.pyplot',
-        'matplotlib.patches',
-        'numpy.core._methods',
-        'numpy.lib.format',
-        'reportlab.pdfgen.canvas',
-        'reportlab.lib.pagesizes',
-        'reportlab.lib.colors',
-        'csv_parser',
-        'pdf_generator',
-        'config',
-        'error_handler',
-    ],
-    hookspath=[],
-    hooksconfig={{}},
-    runtime_hooks=[],
-    excludes=[
-        'matplotlib.backends.backend_qt5agg',
-        'matplotlib.backends.backend_gtk3agg',
-        'matplotlib.backends.backend_tkagg',
-        'tkinter',
-        'PyQt5',
-        'PyQt6',
-        'PySide2',
-        'PySide6',
-        'IPython',
-        'jupyter',
-        'notebook',
-        'scipy',
-        'pandas',
-        'sklearn',
-        'tensorflow',
-        'torch',
-    ],
-    win_no_prefer_redirects=False,
-    win_private_assemblies=False,
-    cipher=block_cipher,
-    noarchive=False,
-)
-
-pyz = PYZ(a.pure, a.zipped_data, cipher=block_cipher)
-
-exe = EXE(
-    pyz,
-    a.scripts,
-    a.binaries,
-    a.zipfiles,
-    a.datas,
-    [],
-    name='pcb-generator',
-    debug=False,
-    bootloader_ignore_signals=False,
-    strip=False,
-    upx=True,
-    upx_exclude=[],
-    runtime_tmpdir=None,
-    console=True,
-    disable_windowed_traceback=False,
-    argv_emulation=False,
-    target_arch=None,
-    codesign_identity=None,
-    entitlements_file=None,
-    icon=None,
-)'''
+    # 预生成的字体缓存随包分发到matplotlib/目录
+    font_cache = _prepare_font_cache()
+    datas = [(str(font_cache), 'matplotlib')] if font_cache else []
 
-    if system == 'darwin':  # macOS
-        spec_content += '''
+    # macOS额外追加BUNDLE段
+    if system == 'darwin':
+        platform_extra = """
 
 app = BUNDLE(
     exe,
     name='PCB-Generator.app',
     icon=None,
     bundle_identifier='com.pcbgenerator.cli',
-    info_plist={{
+    info_plist={
         'CFBundleDisplayName': 'PCB Generator',
         'CFBundleVersion': '1.0.0',
         'CFBundleShortVersionString': '1.0.0',
         'NSHighResolutionCapable': True,
         'LSBackgroundOnly': False,
-    }},
-)'''
+    },
+)"""
+    else:
+        platform_extra = ''
+
+    # 模板是静态文件，diff/审阅友好；这里只做一次占位符替换
+    template = Path(__file__).with_name('pcb_generator.spec.in').read_text(encoding='utf-8')
+    spec_content = (
+        template
+        .replace('@MAIN_SCRIPT@', main_script)
+        .replace('@DATAS@', repr(datas))
+        .replace('@STRIP@', repr(strip))
+        .replace('@UPX@', repr(upx))
+        .replace('@PLATFORM_EXTRA@', platform_extra)
+    )
+
+    # 内容未变化时不重写：避免mtime更新连带触发PyInstaller
+    # 对spec的无谓重新处理，也让spec参与的构建缓存键保持稳定
+    target = Path('pcb_generator.spec')
+    if target.exists() and target.read_text(encoding='utf-8') == spec_content:
+        print("规格文件内容未变化: pcb_generator.spec")
+        return
 
-    with open('pcb_generator.spec', 'w', encoding='utf-8') as f:
-        f.write(spec_content)
-    
+    target.write_text(spec_content, encoding='utf-8')
     print("已创建PyInstaller规格文件: pcb_generator.spec")
 
 
@@ -163,16 +231,24 @@ def build_executable():
         cmd = [sys.executable, "-m", "PyInstaller", "pcb_generator.spec"]
         
         print(f"执行命令: {' '.join(cmd)}")
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        
-        if result.returncode == 0:
+
+        # 流式转发构建日志：进度实时可见，父进程内存占用恒定
+        proc = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1
+        )
+        for line in proc.stdout:
+            print(line, end='')
+        returncode = proc.wait()
+
+        if returncode == 0:
             print("构建成功！")
-            print(result.stdout)
             return True
         else:
             print("构建失败！")
-            print("错误输出:")
-            print(result.stderr)
             return False
             
     except Exception as e:
@@ -236,19 +312,48 @@ CSV文件应包含以下列：
 
 def main():
     """主函数"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='PCB位号图生成器打包脚本')
+    parser.add_argument(
+        '--compress',
+        action='store_true',
+        help='启用UPX压缩减小体积（会增加每次启动的解压开销）'
+    )
+    parser.add_argument(
+        '--recheck',
+        action='store_true',
+        help='忽略版本戳缓存，重新检查PyInstaller安装'
+    )
+    args = parser.parse_args()
+
     print("PCB位号图生成器 - 打包脚本")
     print("=" * 50)
-    
+
     # 检查PyInstaller
-    if not check_pyinstaller():
+    if not check_pyinstaller(recheck=args.recheck):
         return False
-    
-    # 清理构建目录
+
+    # 先渲染规格文件再算缓存键：键哈希的是刚生成的spec内容，
+    # spec.in模板的改动和--compress/PCB_STRIP_BUILD选项都会
+    # 体现在其中，不会命中陈旧缓存（strip会破坏numpy随附的
+    # OpenBLAS，默认关闭）
+    strip = os.environ.get('PCB_STRIP_BUILD') == '1'
+    create_spec_file(upx=args.compress, strip=strip)
+
+    # 检查构建缓存：源文件、规格和工具链均未变化时跳过整个构建
+    build_key = _compute_build_key()
+    key_file = Path('dist') / '.build-key'
+    cached_exe = _find_built_executable()
+    if cached_exe and key_file.exists() and key_file.read_text().strip() == build_key:
+        print(f"构建缓存命中，跳过构建: {cached_exe.absolute()}")
+        return True
+    print("构建缓存未命中，开始完整构建")
+
+    # 清理构建目录（会连同spec一起删掉，清理后重新渲染）
     clean_build_dirs()
-    
-    # 创建规格文件
-    create_spec_file()
-    
+    create_spec_file(upx=args.compress, strip=strip)
+
     # 构建可执行文件
     if not build_executable():
         return False
@@ -266,6 +371,10 @@ def main():
         exe_path = Path('dist') / 'pcb-generator'
     
     if exe_path.exists():
+        # 记录本次构建的缓存键，供下次增量判断
+        key_file = Path('dist') / '.build-key'
+        key_file.write_text(_compute_build_key())
+
         print(f"\n构建完成！可执行文件位置: {exe_path.absolute()}")
         print(f"文件大小: {exe_path.stat().st_size / 1024 / 1024:.1f} MB")
         
@@ -3,21 +3,44 @@
 """
 独立二进制文件打包脚本
 使用PyInstaller将程序打包为完全独立的可执行文件
+
+默认使用--onedir模式打包：可执行文件和依赖库直接摆放在
+dist/pcb-generator/目录中，启动时无需解压临时文件，
+冷启动速度比--onefile模式快一个数量级。
+如需单文件分发，可使用 --pack onefile 选项。
+
+build/目录是PyInstaller的分析缓存（类似C构建的ccache），
+默认在两次构建之间保留，使增量构建跳过对matplotlib/numpy
+依赖图的重新分析。使用 --fresh 选项可强制完整重建。
 """
 
+import argparse
 import os
 import sys
 import shutil
 import subprocess
 import platform
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 
-def check_pyinstaller():
+# PyInstaller版本戳：存在即表示上次检查已通过
+_PYI_STAMP = Path('.build-cache/pyinstaller.version')
+
+
+def check_pyinstaller(recheck=False):
     """检查并安装PyInstaller"""
+    # 命中版本戳时跳过导入——导入PyInstaller本身要数百毫秒，
+    # 而它马上就会作为子进程被重新启动
+    if not recheck and _PYI_STAMP.exists():
+        print(f"✓ PyInstaller已安装（缓存），版本: {_PYI_STAMP.read_text().strip()}")
+        return True
+
     try:
         import PyInstaller
         print(f"✓ PyInstaller已安装，版本: {PyInstaller.__version__}")
+        _PYI_STAMP.parent.mkdir(exist_ok=True)
+        _PYI_STAMP.write_text(PyInstaller.__version__)
         return True
     except ImportError:
         print("PyInstaller未安装，正在安装...")
@@ -30,35 +53,82 @@ def check_pyinstaller():
             return False
 
 
+def _remove_dir(dir_name):
+    """删除单个目录：先改名再删除，调用方立即拿回目录名"""
+    if not Path(dir_name).exists():
+        return
+
+    try:
+        # rename瞬间完成，真正的逐文件unlink在改名后的暂存目录上进行
+        stash = Path(f'.{dir_name}.stash.{os.getpid()}')
+        os.rename(dir_name, stash)
+        shutil.rmtree(stash, ignore_errors=True)
+    except OSError:
+        shutil.rmtree(dir_name, ignore_errors=True)
+
+    print(f"✓ 清理目录: {dir_name}")
+
+
 def clean_build_dirs():
     """清理构建目录"""
     dirs_to_clean = ['build', 'dist', '__pycache__']
-    files_to_clean = ['*.spec']
-    
-    for dir_name in dirs_to_clean:
-        if Path(dir_name).exists():
-            shutil.rmtree(dir_name)
-            print(f"✓ 清理目录: {dir_name}")
-    
-    for pattern in files_to_clean:
-        for file_path in Path('.').glob(pattern):
-            file_path.unlink()
-            print(f"✓ 清理文件: {file_path}")
 
+    # 各目录树的unlink互不依赖，多线程下内核可以流水线处理
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(_remove_dir, dirs_to_clean))
+
+    for file_path in Path('.').glob('*.spec'):
+        file_path.unlink(missing_ok=True)
+        print(f"✓ 清理文件: {file_path}")
+
+
+def _prepare_font_cache():
+    """
+    预生成matplotlib字体缓存
+
+    冻结后的程序首次import matplotlib时，若缓存目录里没有
+    fontlist文件，会扫描系统字体目录重建缓存，耗时1-3秒。
+    构建时预先转储缓存并打进包里，配合runtime_hooks/mpl_cache.py
+    把MPLCONFIGDIR指向它，首启即可直接命中。
+
+    Returns:
+        缓存文件路径，matplotlib不可用时返回None
+    """
+    try:
+        from matplotlib import font_manager
+    except ImportError:
+        return None
 
-def build_standalone():
-    """构建独立可执行文件"""
+    cache_dir = Path('.build-cache/matplotlib')
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    # 文件名中的版本号必须与运行时matplotlib查找的一致
+    cache_file = cache_dir / f'fontlist-v{font_manager.FontManager.__version__}.json'
+    if not cache_file.exists():
+        font_manager.json_dump(font_manager.fontManager, str(cache_file))
+        print(f"✓ 已生成matplotlib字体缓存: {cache_file}")
+
+    return cache_file
+
+
+def build_standalone(pack='onedir'):
+    """
+    构建独立可执行文件
+
+    Args:
+        pack: 打包模式，'onedir'（目录分发，启动快）或'onefile'（单文件）
+    """
     print("开始构建独立可执行文件...")
-    
+
     # 构建参数
     cmd = [
         sys.executable, "-m", "PyInstaller",
-        "--onefile",  # 单文件模式
+        f"--{pack}",  # 打包模式
         "--console",  # 控制台应用
         "--name", "pcb-generator",
-        "--clean",
         "--noconfirm",
-        
+        "--noupx",  # UPX解压会拖慢每次启动，且可能破坏部分动态库
+        "--runtime-hook", "runtime_hooks/mpl_cache.py",  # 命中随包分发的字体缓存
+
         # 包含的模块
         "--hidden-import", "matplotlib.backends.backend_pdf",
         "--hidden-import", "matplotlib.backends.backend_agg", 
@@ -71,8 +141,21 @@ def build_standalone():
         
         # 排除的模块（减小文件大小）
         "--exclude-module", "tkinter",
+        "--exclude-module", "tcl",
+        "--exclude-module", "tk",
         "--exclude-module", "matplotlib.backends.backend_tkagg",
         "--exclude-module", "matplotlib.backends.backend_qt5agg",
+        "--exclude-module", "matplotlib.backends.backend_webagg",
+        "--exclude-module", "matplotlib.backends.backend_nbagg",
+        "--exclude-module", "matplotlib.tests",
+        "--exclude-module", "matplotlib.sphinxext",
+        "--exclude-module", "numpy.tests",
+        "--exclude-module", "numpy.testing",
+        "--exclude-module", "numpy.f2py",
+        "--exclude-module", "numpy.fft",
+        "--exclude-module", "numpy.distutils",
+        "--exclude-module", "PIL.ImageQt",
+        "--exclude-module", "reportlab.graphics.testshapes",
         "--exclude-module", "PyQt5",
         "--exclude-module", "PyQt6",
         "--exclude-module", "PySide2",
@@ -84,31 +167,115 @@ def build_standalone():
         "--exclude-module", "sklearn",
         "--exclude-module", "tensorflow",
         "--exclude-module", "torch",
+        "--exclude-module", "setuptools",
+        "--exclude-module", "pip",
+        "--exclude-module", "pkg_resources._vendor",
+        "--exclude-module", "distutils",
+        "--exclude-module", "lib2to3",
+        "--exclude-module", "pydoc_data",
+        "--exclude-module", "xml.dom.pulldom",
+        "--exclude-module", "email.test",
         
         # 主入口文件
         "cli_main.py"
     ]
-    
+
+    # 随包携带预生成的matplotlib字体缓存，跳过首启的字体扫描
+    font_cache = _prepare_font_cache()
+    if font_cache:
+        cmd[3:3] = ["--add-data", f"{font_cache}{os.pathsep}matplotlib"]
+
+    if pack == 'onedir':
+        # 依赖库收纳到lib子目录，保持用户可见的目录整洁
+        cmd[3:3] = ["--contents-directory", "lib"]
+        # .pyc直接平铺在磁盘上，由CPython原生导入器加载，
+        # 跳过PYZ归档的运行时解包和自定义importer
+        cmd.append("--noarchive")
+
+    # 符号表剥离仅在显式要求时启用（PCB_STRIP_BUILD=1）：
+    # strip会破坏numpy随附的OpenBLAS动态库（ELF对齐被改写，
+    # 加载时报"load command address/offset not page-aligned"）
+    if platform.system().lower() != 'windows' and os.environ.get('PCB_STRIP_BUILD') == '1':
+        cmd.append("--strip")
+
     print(f"执行命令: {' '.join(cmd[:10])}...")  # 只显示前几个参数
     
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        
-        if result.returncode == 0:
+        # 流式转发构建日志：进度实时可见，父进程内存占用恒定，
+        # 不必把PyInstaller几十MB的分析日志整份缓存在内存里
+        proc = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1
+        )
+        for line in proc.stdout:
+            print(line, end='')
+        returncode = proc.wait()
+
+        if returncode == 0:
             print("✓ 构建成功！")
-            return True
+            return _smoke_check(pack)
         else:
             print("✗ 构建失败！")
-            print("错误输出:")
-            print(result.stderr)
             return False
-            
+
     except Exception as e:
         print(f"✗ 构建过程中发生错误: {e}")
         return False
 
 
-def create_distribution():
+def _smoke_check(pack='onedir'):
+    """
+    运行打包产物的冒烟测试
+
+    排除列表较为激进，构建后立即执行--help验证被排除的模块
+    确实不被程序引用；如有排除项破坏了导入链，这里会立刻暴露。
+    """
+    system = platform.system().lower()
+    exe_name = 'pcb-generator.exe' if system == 'windows' else 'pcb-generator'
+
+    if pack == 'onedir':
+        exe_path = Path('dist') / 'pcb-generator' / exe_name
+    else:
+        exe_path = Path('dist') / exe_name
+
+    if not exe_path.exists():
+        print(f"✗ 冒烟测试失败：可执行文件不存在: {exe_path}")
+        return False
+
+    result = subprocess.run([str(exe_path), "--help"], capture_output=True, text=True)
+    if result.returncode != 0:
+        print("✗ 冒烟测试失败，可能是排除的模块被实际引用:")
+        print(result.stderr)
+        return False
+
+    # --help只走argparse，重型导入都被推迟到其后，按不到被排除的
+    # 模块；再跑一遍真实的CSV→PDF流程，让被排除项破坏的numpy/
+    # matplotlib导入链在构建阶段就暴露
+    import tempfile
+    sample = (
+        "Num,RefDes,PartDecal,X,Y,Layer,Orient.,value\n"
+        "1,C1,C0603,10,10,Top,0,10uF\n"
+        "2,R1,R0402,20,10,Bottom,90,1K\n"
+    )
+    with tempfile.TemporaryDirectory() as td:
+        csv_path = Path(td) / 'smoke.csv'
+        csv_path.write_text(sample, encoding='utf-8')
+        result = subprocess.run(
+            [str(exe_path), str(csv_path), '-o', td, '--refdes-only'],
+            capture_output=True, text=True)
+        if result.returncode != 0 or not list(Path(td).glob('smoke/*.pdf')):
+            print("✗ 冒烟测试失败：示例CSV未生成PDF:")
+            print(result.stderr)
+            return False
+
+    print("✓ 冒烟测试通过")
+    return True
+
+
+def create_distribution(pack='onedir'):
     """创建分发包"""
     dist_dir = Path('dist')
     if not dist_dir.exists():
@@ -122,35 +289,43 @@ def create_distribution():
     else:
         exe_name = 'pcb-generator'
 
-    exe_path = dist_dir / exe_name
+    if pack == 'onedir':
+        exe_path = dist_dir / 'pcb-generator' / exe_name
+    else:
+        exe_path = dist_dir / exe_name
     if not exe_path.exists():
         print(f"✗ 可执行文件不存在: {exe_path}")
         return False
-    
+
     # 创建README文件
-    readme_content = """# PCB Generator - 独立可执行文件
+    if pack == 'onedir':
+        run_cmd = './pcb-generator/pcb-generator'
+    else:
+        run_cmd = './pcb-generator'
+
+    readme_content = f"""# PCB Generator - 独立可执行文件
 
 ## 使用方法
 
 ### 命令行使用
 ```bash
 # 生成所有类型的PDF
-./pcb-generator input.csv
+{run_cmd} input.csv
 
 # 指定输出目录
-./pcb-generator input.csv -o output_dir
+{run_cmd} input.csv -o output_dir
 
 # 只生成编号图
-./pcb-generator input.csv --refdes-only
+{run_cmd} input.csv --refdes-only
 
-# 只生成封装图  
-./pcb-generator input.csv --package-only
+# 只生成封装图
+{run_cmd} input.csv --package-only
 
 # 只生成值图
-./pcb-generator input.csv --value-only
+{run_cmd} input.csv --value-only
 
 # 查看帮助
-./pcb-generator --help
+{run_cmd} --help
 ```
 
 ### CSV文件格式
@@ -188,44 +363,91 @@ Num,RefDes,PartDecal,X,Y,Layer,Orient.,value
     print(f"✓ 创建说明文件: {readme_path}")
     
     # 显示文件信息
-    file_size = exe_path.stat().st_size / (1024 * 1024)  # MB
-    print(f"✓ 可执行文件: {exe_path} ({file_size:.1f} MB)")
-    
+    if pack == 'onedir':
+        # 统计整个分发目录的大小
+        app_dir = dist_dir / 'pcb-generator'
+        total_size = sum(
+            f.stat().st_size for f in app_dir.rglob('*') if f.is_file()
+        ) / (1024 * 1024)  # MB
+        print(f"✓ 可执行文件: {exe_path}")
+        print(f"✓ 分发目录: {app_dir} ({total_size:.1f} MB)")
+    else:
+        file_size = exe_path.stat().st_size / (1024 * 1024)  # MB
+        print(f"✓ 可执行文件: {exe_path} ({file_size:.1f} MB)")
+
+    # 确认去掉PYZ归档后各模块仍能被正常加载
+    result = subprocess.run([str(exe_path), "--version"], capture_output=True, text=True)
+    if result.returncode != 0:
+        print("✗ --version冒烟测试失败:")
+        print(result.stderr)
+        return False
+    print(f"✓ 版本检查: {result.stdout.strip()}")
+
     return True
 
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description='PCB Generator 独立二进制文件构建器')
+    parser.add_argument(
+        '--pack',
+        choices=['onedir', 'onefile'],
+        default='onedir',
+        help='打包模式：onedir启动更快（默认），onefile生成单个文件'
+    )
+    parser.add_argument(
+        '--fresh',
+        action='store_true',
+        help='清空build/分析缓存后完整重建（默认增量构建）'
+    )
+    parser.add_argument(
+        '--recheck',
+        action='store_true',
+        help='忽略版本戳缓存，重新检查PyInstaller安装'
+    )
+    args = parser.parse_args()
+
     print("PCB Generator - 独立二进制文件构建器")
     print("=" * 50)
-    
+
     # 检查PyInstaller
-    if not check_pyinstaller():
+    if not check_pyinstaller(recheck=args.recheck):
         return False
-    
+
     # 清理构建目录
-    print("\n清理构建目录...")
-    clean_build_dirs()
-    
+    if args.fresh:
+        print("\n清理构建目录...")
+        clean_build_dirs()
+    else:
+        # 保留build/分析缓存，只清理上次的分发产物
+        if Path('dist').exists():
+            shutil.rmtree('dist')
+            print("\n✓ 清理目录: dist")
+
     # 构建可执行文件
     print("\n构建独立可执行文件...")
-    if not build_standalone():
+    if not build_standalone(pack=args.pack):
         return False
-    
+
     # 创建分发包
     print("\n创建分发包...")
-    if not create_distribution():
+    if not create_distribution(pack=args.pack):
         return False
-    
+
     print("\n" + "=" * 50)
     print("✓ 构建完成！")
     print("\n生成的文件:")
-    
+
     dist_dir = Path('dist')
     for file_path in dist_dir.iterdir():
         if file_path.is_file():
             size = file_path.stat().st_size / (1024 * 1024)  # MB
             print(f"  {file_path} ({size:.1f} MB)")
+        elif file_path.is_dir():
+            size = sum(
+                f.stat().st_size for f in file_path.rglob('*') if f.is_file()
+            ) / (1024 * 1024)  # MB
+            print(f"  {file_path}/ ({size:.1f} MB)")
     
     print(f"\n独立可执行文件位于: {dist_dir.absolute()}")
     print("可以将整个dist目录分发给用户使用。")
@@ -10,14 +10,9 @@ import os
 import sys
 from pathlib import Path
 
-# 导入自定义模块
-from csv_parser import CSVParser
-from pdf_generator import PDFGenerator
-from config import Config
-from error_handler import (
-    get_error_handler, ValidationError, 
-    validate_csv_file, validate_output_directory
-)
+# 自定义模块在main()中延迟导入：pdf_generator会连带加载
+# matplotlib等重量级依赖，提前导入会拖慢--help/--version等
+# 不需要它们的快速路径
 
 
 def parse_arguments():
@@ -145,15 +140,49 @@ def print_progress(message, verbose=True):
         print(f"[INFO] {message}")
 
 
+def _generate_one(task):
+    """
+    在工作进程中生成一类PDF的一层（供ProcessPoolExecutor调用）
+
+    Args:
+        task: (图类型, 层名, 元器件字典, 输出目录, 配置) 元组。
+            元器件字典只填充目标层，另一层为空列表，
+            _generate_pdf会自动跳过空层。
+    """
+    kind, layer, components, output_dir, config = task
+
+    from pdf_generator import PDFGenerator
+    generator = PDFGenerator(config)
+
+    if kind == 'refdes':
+        generator.generate_refdes_pdf(components, output_dir)
+    elif kind == 'package':
+        generator.generate_package_pdf(components, output_dir)
+    else:
+        generator.generate_value_pdf(components, output_dir)
+
+    return kind, layer
+
+
 def main():
     """主函数"""
+    # 解析命令行参数（--help/--version/参数错误在这里直接返回，
+    # 不触发任何重量级导入）
+    args = parse_arguments()
+
+    # 延迟导入自定义模块及其背后的matplotlib/numpy依赖
+    # （PDFGenerator在_generate_one的工作进程中导入）
+    from csv_parser import CSVParser
+    from config import Config
+    from error_handler import (
+        get_error_handler, ValidationError,
+        validate_csv_file, validate_output_directory
+    )
+
     try:
         # 设置错误处理器
         error_handler = get_error_handler()
-        
-        # 解析命令行参数
-        args = parse_arguments()
-        
+
         print_progress("PCB元器件位号图生成器 v1.0", args.verbose)
         print_progress("=" * 50, args.verbose)
         
@@ -186,31 +215,53 @@ def main():
         output_dir.mkdir(exist_ok=True)
         print_progress(f"输出目录: {output_dir}", args.verbose)
         
-        # 初始化PDF生成器
+        # 配置
         config = Config()
         config.pdf_quality = args.quality
-        generator = PDFGenerator(config)
-        
-        generated_files = []
-        
-        # 生成编号图
+
+        # 组装生成任务：按 图类型×层 拆分，最多6个相互独立的
+        # 渲染（输出文件互不重叠），给每个任务只装目标层的列表
+        kinds = []
+        file_prefixes = []
         if generate_refdes:
-            print_progress("正在生成编号图...", args.verbose)
-            generator.generate_refdes_pdf(components, output_dir)
-            generated_files.extend(['RefDes_Top.pdf', 'RefDes_Bottom.pdf'])
-        
-        # 生成封装图
+            kinds.append('refdes')
+            file_prefixes.append('RefDes')
         if generate_package:
-            print_progress("正在生成封装图...", args.verbose)
-            generator.generate_package_pdf(components, output_dir)
-            generated_files.extend(['Package_Top.pdf', 'Package_Bottom.pdf'])
-        
-        # 生成值图
+            kinds.append('package')
+            file_prefixes.append('Package')
         if generate_value:
-            print_progress("正在生成值图...", args.verbose)
-            generator.generate_value_pdf(components, output_dir)
-            generated_files.extend(['Value_Top.pdf', 'Value_Bottom.pdf'])
-        
+            kinds.append('value')
+            file_prefixes.append('Value')
+
+        layer_lists = {'top': (components['top'], []),
+                       'bottom': ([], components['bottom'])}
+        tasks = []
+        for kind in kinds:
+            for layer, (top, bottom) in layer_lists.items():
+                if components[layer]:
+                    tasks.append((kind, layer,
+                                  {'top': top, 'bottom': bottom, 'all': []},
+                                  output_dir, config))
+
+        generated_files = []
+        for prefix in file_prefixes:
+            generated_files.extend([f'{prefix}_Top.pdf', f'{prefix}_Bottom.pdf'])
+
+        if len(tasks) <= 1:
+            # 单任务直接在当前进程执行，省去子进程启动开销
+            print_progress("正在生成PDF...", args.verbose)
+            for task in tasks:
+                _generate_one(task)
+        else:
+            # matplotlib渲染是CPU密集型，用进程池并行生成各张图
+            print_progress(f"正在并行生成{len(tasks)}张PDF...", args.verbose)
+            import os
+            from concurrent.futures import ProcessPoolExecutor
+            workers = min(len(tasks), os.cpu_count() or 1)
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for kind, layer in executor.map(_generate_one, tasks):
+                    print_progress(f"{kind}图({layer}层)生成完成", args.verbose)
+
         print_progress("生成完成！", args.verbose)
         print_progress("", args.verbose)
         print("生成的文件:")
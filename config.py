@@ -5,14 +5,38 @@
 包含程序的各种配置参数
 """
 
-from dataclasses import dataclass
-from typing import Dict, Tuple, List
+import functools
+import numpy as np
+from dataclasses import dataclass, field, fields
+from types import MappingProxyType
+from typing import Any, Dict, Tuple, List
 import os
 
+# JSON编解码优先使用C实现的orjson，未安装时回退到标准库json
+try:
+    import orjson
 
-@dataclass
+    def _json_dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+
+    _json_loads = orjson.loads
+except ImportError:
+    import json
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+
+    _json_loads = json.loads
+
+
+@dataclass(slots=True)
 class Config:
-    """程序配置类"""
+    """程序配置类
+
+    使用槽位布局（slots）：PDF生成的逐元器件循环会高频读取
+    配置属性，槽位访问是固定偏移加载，比__dict__探查更快，
+    实例内存占用也更小。
+    """
     
     # 图形配置
     figure_size: Tuple[float, float] = (16.53, 11.69)  # A3横向尺寸（英寸），提供更多空间
@@ -42,7 +66,15 @@ class Config:
     
     # 输出配置
     pdf_quality: str = 'high'  # 'low', 'medium', 'high'
-    
+    raster_threshold: int = 5000  # 标签数超过该值时整层栅格化为单个图元
+
+    # __post_init__中填充的派生索引（不参与构造/比较）
+    _normalized_sizes: Any = field(init=False, repr=False, compare=False)
+    _sorted_keys: Any = field(init=False, repr=False, compare=False)
+    _density_thresholds: Any = field(init=False, repr=False, compare=False)
+    _density_mults: Any = field(init=False, repr=False, compare=False)
+    _cached_package_size: Any = field(init=False, repr=False, compare=False)
+
     def __post_init__(self):
         """初始化后处理"""
         if self.package_sizes is None:
@@ -151,52 +183,85 @@ class Config:
         
         if self.supported_csv_extensions is None:
             self.supported_csv_extensions = ['.csv', '.txt']
+
+        # 预计算标准化键的只读索引：精确匹配走一次dict探查，
+        # 模糊匹配只需扫描按长度降序排列的键（最长匹配优先）
+        self._normalized_sizes = MappingProxyType({
+            key.lower().replace('-', '').replace('_', ''): size
+            for key, size in self.package_sizes.items()
+        })
+        self._sorted_keys = sorted(self._normalized_sizes.keys(), key=len, reverse=True)
+
+        # 密度阈值与对应的字体缩放系数（低密度→高密度→极高密度），
+        # 查表通过np.searchsorted完成，替代逐级if/elif分支
+        self._density_thresholds = np.array([0.05, 0.1, 0.15])
+        self._density_mults = np.array([1.1, 0.85, 0.7, 0.5])
+
+        # 按实例缓存查询结果：PCB上大量元器件复用同一批封装名，
+        # 热循环里绝大多数调用可直接命中缓存
+        self._cached_package_size = functools.lru_cache(maxsize=2048)(
+            self._lookup_package_size
+        )
     
+    def __getstate__(self):
+        """只序列化真实配置项；派生索引和缓存无法pickle，反序列化时重建"""
+        return {f.name: getattr(self, f.name) for f in fields(self) if f.init}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+        self.__post_init__()
+
     def get_package_size(self, package: str) -> Tuple[float, float]:
         """
-        获取封装尺寸
-        
+        获取封装尺寸（结果按封装名称缓存）
+
         Args:
             package: 封装名称
-            
+
         Returns:
             (width, height) 尺寸元组（毫米）
         """
+        return self._cached_package_size(package)
+
+    def cache_stats(self):
+        """返回封装尺寸缓存的命中统计"""
+        return self._cached_package_size.cache_info()
+
+    def _lookup_package_size(self, package: str) -> Tuple[float, float]:
+        """封装尺寸的实际查询逻辑（未缓存）"""
         package_lower = package.lower().replace('-', '').replace('_', '')
-        
+
         # 精确匹配
-        if package_lower in self.package_sizes:
-            return self.package_sizes[package_lower]
-        
-        # 模糊匹配
-        for key, size in self.package_sizes.items():
-            if key in package_lower or package_lower.startswith(key):
-                return size
-        
+        size = self._normalized_sizes.get(package_lower)
+        if size is not None:
+            return size
+
+        # 模糊匹配（键按长度降序，最长匹配优先）
+        for key in self._sorted_keys:
+            if key in package_lower:
+                return self._normalized_sizes[key]
+
         # 尝试从名称中提取尺寸信息
         size = self._extract_size_from_name(package)
         if size:
             return size
-        
+
         # 默认尺寸
         return (2.0, 2.0)
-    
+
     def _extract_size_from_name(self, package: str) -> Tuple[float, float]:
         """从封装名称中提取尺寸信息"""
-        import re
-        
-        # 匹配类似 "0603", "1206" 等格式
-        match = re.search(r'(\d{2})(\d{2})', package)
-        if match:
-            width_code = int(match.group(1))
-            height_code = int(match.group(2))
-            
-            # 转换为毫米（假设是英制代码）
-            width = width_code * 0.254  # 0.01英寸 = 0.254毫米
-            height = height_code * 0.254
-            
-            return (width, height)
-        
+        # 扫描首个四位连续数字（如"0603"、"1206"）。封装名很短，
+        # 直接的字符比较比正则引擎的启动开销更划算
+        for i in range(len(package) - 3):
+            a, b, c, d = package[i], package[i + 1], package[i + 2], package[i + 3]
+            if '0' <= a <= '9' and '0' <= b <= '9' and '0' <= c <= '9' and '0' <= d <= '9':
+                # 转换为毫米（假设是英制代码）
+                width = int(a + b) * 0.254  # 0.01英寸 = 0.254毫米
+                height = int(c + d) * 0.254
+                return (width, height)
+
         return None
     
     def get_dpi_by_quality(self) -> int:
@@ -210,14 +275,23 @@ class Config:
     
     def get_font_size_by_density(self, density: float) -> float:
         """根据元器件密度计算字体大小"""
-        if density > 0.15:  # 极高密度
-            return max(self.min_font_size, self.base_font_size * 0.5)
-        elif density > 0.1:  # 高密度
-            return max(self.min_font_size, self.base_font_size * 0.7)
-        elif density > 0.05:  # 中密度
-            return self.base_font_size * 0.85
-        else:  # 低密度
-            return min(self.max_font_size, self.base_font_size * 1.1)
+        idx = np.searchsorted(self._density_thresholds, density)
+        size = self.base_font_size * self._density_mults[idx]
+        return float(max(self.min_font_size, min(self.max_font_size, size)))
+
+    def get_font_sizes_by_density(self, densities: np.ndarray) -> np.ndarray:
+        """
+        批量计算字体大小
+
+        Args:
+            densities: 元器件密度数组
+
+        Returns:
+            与输入同形状的字体大小数组
+        """
+        indices = np.searchsorted(self._density_thresholds, densities)
+        sizes = self.base_font_size * self._density_mults[indices]
+        return np.clip(sizes, self.min_font_size, self.max_font_size)
     
     def validate(self) -> bool:
         """验证配置参数"""
@@ -235,10 +309,8 @@ class Config:
     
     def save_to_file(self, filepath: str):
         """保存配置到文件"""
-        import json
-        
         config_dict = {
-            'figure_size': self.figure_size,
+            'figure_size': list(self.figure_size),
             'dpi': self.dpi,
             'margin_ratio': self.margin_ratio,
             'base_font_size': self.base_font_size,
@@ -246,27 +318,28 @@ class Config:
             'max_font_size': self.max_font_size,
             'pdf_quality': self.pdf_quality,
         }
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(config_dict, f, indent=2, ensure_ascii=False)
+
+        with open(filepath, 'wb') as f:
+            f.write(_json_dumps(config_dict))
     
     @classmethod
     def load_from_file(cls, filepath: str) -> 'Config':
         """从文件加载配置"""
-        import json
-        
         if not os.path.exists(filepath):
             return cls()
-        
+
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                config_dict = json.load(f)
+            with open(filepath, 'rb') as f:
+                config_dict = _json_loads(f.read())
             
             config = cls()
             for key, value in config_dict.items():
                 if hasattr(config, key):
                     setattr(config, key, value)
-            
+
+            # 配置项可能已变化，丢弃构造时的缓存内容
+            config._cached_package_size.cache_clear()
+
             return config
         except Exception:
             return cls()
@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+pytest会话级准备
+"""
+
+import pytest
+
+
+@pytest.fixture(scope='session', autouse=True)
+def _warm_fonts():
+    """预热matplotlib字体缓存并固定无界面后端
+
+    首次触碰fontManager可能触发整棵字体树扫描（"building the
+    font cache"，慢机器上数秒到十几秒）；在会话开始时做一次，
+    之后所有测试都命中热的JSON缓存。后端固定为Agg，测试全程
+    不依赖显示环境。
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib import font_manager
+    font_manager.fontManager.ttflist
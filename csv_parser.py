@@ -5,12 +5,41 @@ CSV文件解析模块
 用于解析PCB元器件位置数据CSV文件
 """
 
+import codecs
 import csv
+import functools
+import io
 import os
 from typing import List, Dict, Tuple, Optional
 from dataclasses import dataclass
 import re
 
+import numpy as np
+
+
+@functools.lru_cache(maxsize=32)
+def _compile_package_pattern(pattern: str):
+    """
+    编译封装筛选用的正则并跨调用复用
+
+    纯字面量模式返回None，调用方改走C层子串查找，
+    完全绕开正则引擎。
+    """
+    if re.escape(pattern) == pattern:
+        return None
+    return re.compile(pattern, re.IGNORECASE)
+
+
+# 层面名称标准化表：一次哈希查找代替逐项列表扫描
+_LAYER_MAP = {
+    'top': 'Top',
+    'top layer': 'Top',
+    '正面': 'Top',
+    'bottom': 'Bottom',
+    'bottom layer': 'Bottom',
+    '反面': 'Bottom',
+}
+
 
 @dataclass
 class Component:
@@ -23,34 +52,46 @@ class Component:
     layer: str  # 层面 (Top/Bottom)
     orientation: float  # 角度
     value: str  # 值
-    
+
     def __post_init__(self):
         """数据后处理"""
         # 标准化层面名称
-        if self.layer.lower() in ['top', 'top layer', '正面']:
-            self.layer = 'Top'
-        elif self.layer.lower() in ['bottom', 'bottom layer', '反面']:
-            self.layer = 'Bottom'
-        
+        self.layer = _LAYER_MAP.get(self.layer.lower(), self.layer)
+
         # 确保角度在0-360度范围内
         self.orientation = self.orientation % 360
 
 
 class CSVParser:
     """CSV文件解析器"""
-    
+
+    # 标题行必需的列标记（小写、去掉点号和空格后比较）
+    _REQUIRED_COLUMNS = frozenset(
+        {'num', 'refdes', 'partdecal', 'x', 'y', 'layer', 'orient', 'value'})
+
     def __init__(self):
         self.components: List[Component] = []
         self.top_components: List[Component] = []
         self.bottom_components: List[Component] = []
+
+        # SoA列数组：与components同步填充。聚合查询（边界、按层
+        # 筛选）在连续内存上做向量化归约，不逐个触碰PyObject
+        self.x: np.ndarray = np.empty(0, dtype=np.float64)
+        self.y: np.ndarray = np.empty(0, dtype=np.float64)
+        self.orientation: np.ndarray = np.empty(0, dtype=np.float32)
+        self.layer_id: np.ndarray = np.empty(0, dtype=np.int8)  # 0=Top, 1=Bottom, -1=其他
+        self.refdes: np.ndarray = np.empty(0, dtype=object)
+        self.package: np.ndarray = np.empty(0, dtype=object)
+        self.value: np.ndarray = np.empty(0, dtype=object)
     
     def parse_file(self, file_path: str) -> Dict[str, List[Component]]:
         """
         解析CSV文件
         
         Args:
-            file_path: CSV文件路径
-            
+            file_path: CSV文件路径，或任意可读的文件对象
+                       （如io.StringIO，测试时无需落盘）
+
         Returns:
             包含top和bottom元器件列表的字典
             
@@ -58,57 +99,72 @@ class CSVParser:
             FileNotFoundError: 文件不存在
             ValueError: 文件格式错误
         """
+        # 文件对象直接流式解析，零磁盘I/O
+        if hasattr(file_path, 'read'):
+            return self._parse_stream(file_path)
+
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"文件不存在: {file_path}")
-        
+
+        # 编码只从文件头部探测一次，不再走"UTF-8失败重读GBK
+        # 再重读latin-1"的多遍回退
+        encoding = self._detect_encoding(file_path)
+        with open(file_path, 'r', encoding=encoding, errors='ignore',
+                  newline='') as file:
+            return self._parse_stream(file)
+
+    def _parse_stream(self, stream) -> Dict[str, List[Component]]:
+        """从可读文件对象流式解析CSV内容"""
         self.components.clear()
         self.top_components.clear()
         self.bottom_components.clear()
-        
-        try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
-                # 尝试UTF-8编码
-                content = file.read()
-        except UnicodeDecodeError:
-            try:
-                # 如果UTF-8失败，尝试GBK编码
-                with open(file_path, 'r', encoding='gbk', errors='ignore') as file:
-                    content = file.read()
-            except UnicodeDecodeError:
-                # 最后尝试latin-1编码
-                with open(file_path, 'r', encoding='latin-1', errors='ignore') as file:
-                    content = file.read()
-        
-        # 解析CSV内容
-        lines = content.strip().split('\n')
-        if len(lines) < 2:
+
+        # 流式解析：文件对象直接交给csv.reader，行切分、引号处理
+        # 都在reader的C循环中按行进行，不再把整个文件物化成
+        # content字符串和lines列表，内存占用从O(文件)降到O(行)
+        rows = []
+        row_nums = []
+        data_lines = 0
+        reader = csv.reader(stream)
+        header_fields = next(reader, None)
+        if header_fields is None:
             raise ValueError("CSV文件格式错误：文件内容不足")
-        
-        # 解析标题行
-        header = lines[0].strip()
-        if not self._validate_header(header):
+        if not self._validate_header(','.join(header_fields)):
             raise ValueError("CSV文件格式错误：标题行格式不正确")
-        
-        # 解析数据行
-        for line_num, line in enumerate(lines[1:], start=2):
-            line = line.strip()
-            if not line or line.count(',') < 7:  # 跳过空行或格式不正确的行
+
+        for line_num, fields in enumerate(reader, start=2):
+            data_lines += 1
+            # 跳过空行、字段不足或无序号的行：两个O(1)判断，
+            # 不对行内容做额外扫描
+            if len(fields) < 8 or not fields[0].strip():
                 continue
-            
+            rows.append(fields)
+            row_nums.append(line_num)
+
+        if data_lines == 0:
+            raise ValueError("CSV文件格式错误：文件内容不足")
+
+        if rows:
             try:
-                component = self._parse_component_line(line, line_num)
-                if component:
-                    self.components.append(component)
-                    
-                    # 按层面分类
-                    if component.layer == 'Top':
-                        self.top_components.append(component)
-                    elif component.layer == 'Bottom':
-                        self.bottom_components.append(component)
-            except Exception as e:
-                print(f"警告：第{line_num}行数据解析失败: {e}")
-                continue
-        
+                # 快路径：数值列整列交给numpy批量转换
+                self.components = self._build_components(rows)
+            except ValueError:
+                # 存在脏数据时回退到逐行解析，保留精确到行号的告警
+                self.components = self._parse_rows_slow(rows, row_nums)
+
+        # 按层面分类：单趟分桶，不再对components做两遍过滤扫描。
+        # 这份切分结果随返回字典被三个生成器共用，之后不再重算
+        self.top_components = top = []
+        self.bottom_components = bottom = []
+        for c in self.components:
+            if c.layer == 'Top':
+                top.append(c)
+            elif c.layer == 'Bottom':
+                bottom.append(c)
+
+        # 构建SoA列数组
+        self._build_columns()
+
         if not self.components:
             raise ValueError("CSV文件中没有找到有效的元器件数据")
         
@@ -118,24 +174,92 @@ class CSVParser:
             'all': self.components
         }
     
+    @staticmethod
+    def _detect_encoding(file_path: str) -> str:
+        """
+        从文件头部64KB探测编码
+
+        BOM优先，然后尝试UTF-8严格解码，失败则依次考虑GBK和
+        latin-1。只解码一个小前缀，代价与文件大小无关。
+        """
+        with open(file_path, 'rb') as f:
+            head = f.read(65536)
+        truncated = len(head) == 65536
+
+        if head.startswith(b'\xef\xbb\xbf'):
+            return 'utf-8-sig'
+
+        for encoding in ('utf-8', 'gbk'):
+            # 64KB边界可能正好切在多字节字符中间：增量解码器在
+            # final=False时不把末尾被截断的序列当错误，只有前缀
+            # 即整个文件时才要求序列完整
+            decoder = codecs.getincrementaldecoder(encoding)()
+            try:
+                decoder.decode(head, final=not truncated)
+                return encoding
+            except UnicodeDecodeError:
+                continue
+
+        return 'latin-1'
+
     def _validate_header(self, header: str) -> bool:
         """验证CSV标题行格式"""
-        expected_columns = ['num', 'refdes', 'partdecal', 'x', 'y', 'layer', 'orient', 'value']
-        header_lower = header.lower().replace('.', '').replace(' ', '')
-        
-        # 检查是否包含必要的列
-        for col in expected_columns:
-            if col not in header_lower:
-                return False
-        
-        return True
+        # 按列切分后做集合包含判断：一次遍历、哈希查找，
+        # 也避免了子串扫描把'num'误匹配进'number'之类的列名
+        tokens = {t.lower().replace('.', '').replace(' ', '')
+                  for t in header.split(',')}
+        return self._REQUIRED_COLUMNS.issubset(tokens)
     
-    def _parse_component_line(self, line: str, line_num: int) -> Optional[Component]:
-        """解析单行元器件数据"""
-        # 使用CSV模块解析，处理可能包含逗号的字段
-        reader = csv.reader([line])
-        fields = next(reader)
-        
+    def _build_components(self, rows: List[List[str]]) -> List[Component]:
+        """
+        批量构建元器件列表（快路径）
+
+        数值列整列交给np.asarray转换，float解析循环全部在C层完成；
+        任何一列存在脏数据即抛ValueError，由调用方回退到逐行慢路径。
+        """
+        nums = np.asarray([r[0] for r in rows], dtype=np.float64)
+        xs = np.asarray([r[3] for r in rows], dtype=np.float64)
+        ys = np.asarray([r[4] for r in rows], dtype=np.float64)
+        orients = np.asarray([r[6].strip() or '0.0' for r in rows], dtype=np.float64)
+
+        components = []
+        for n, x, y, o, r in zip(nums, xs, ys, orients, rows):
+            refdes = r[1].strip()
+            layer = r[5].strip()
+            if not refdes or not layer:
+                raise ValueError("编号或层面不能为空")
+
+            components.append(Component(
+                num=int(n),
+                refdes=refdes,
+                package=r[2].strip(),
+                x=float(x),
+                y=float(y),
+                layer=layer,
+                orientation=float(o),
+                value=r[7].strip()
+            ))
+
+        return components
+
+    def _parse_rows_slow(self, rows: List[List[str]],
+                         row_nums: List[int]) -> List[Component]:
+        """逐行解析元器件数据（慢路径），跳过脏数据行并告警"""
+        components = []
+        for fields, line_num in zip(rows, row_nums):
+            try:
+                component = self._parse_component_fields(fields, line_num)
+                if component:
+                    components.append(component)
+            except Exception as e:
+                print(f"警告：第{line_num}行数据解析失败: {e}")
+                continue
+
+        return components
+
+    def _parse_component_fields(self, fields: List[str],
+                                line_num: int) -> Optional[Component]:
+        """解析单行元器件字段"""
         if len(fields) < 8:
             raise ValueError(f"字段数量不足，期望8个字段，实际{len(fields)}个")
         
@@ -190,46 +314,87 @@ class CSVParser:
                 return default
             raise ValueError(f"{field_name}格式错误: {value}")
     
+    def _build_columns(self):
+        """从components构建SoA列数组"""
+        comps = self.components
+        n = len(comps)
+        layer_codes = {'Top': 0, 'Bottom': 1}
+
+        self.x = np.fromiter((c.x for c in comps), dtype=np.float64, count=n)
+        self.y = np.fromiter((c.y for c in comps), dtype=np.float64, count=n)
+        self.orientation = np.fromiter(
+            (c.orientation for c in comps), dtype=np.float32, count=n)
+        self.layer_id = np.fromiter(
+            (layer_codes.get(c.layer, -1) for c in comps), dtype=np.int8, count=n)
+        self.refdes = np.array([c.refdes for c in comps], dtype=object)
+        self.package = np.array([c.package for c in comps], dtype=object)
+        self.value = np.array([c.value for c in comps], dtype=object)
+
     def get_bounds(self, components: List[Component]) -> Tuple[float, float, float, float]:
         """
         获取元器件的边界坐标
-        
+
         Args:
             components: 元器件列表
-            
+
         Returns:
             (min_x, min_y, max_x, max_y)
         """
         if not components:
             return (0, 0, 0, 0)
-        
-        x_coords = [comp.x for comp in components]
-        y_coords = [comp.y for comp in components]
-        
+
+        # 完整列表直接在缓存的列数组上做SIMD归约
+        if components is self.components and len(self.x) == len(components):
+            xs, ys = self.x, self.y
+        else:
+            n = len(components)
+            xs = np.fromiter((c.x for c in components), dtype=np.float64, count=n)
+            ys = np.fromiter((c.y for c in components), dtype=np.float64, count=n)
+
         return (
-            min(x_coords),
-            min(y_coords),
-            max(x_coords),
-            max(y_coords)
+            float(xs.min()),
+            float(ys.min()),
+            float(xs.max()),
+            float(ys.max())
         )
-    
+
     def filter_by_layer(self, layer: str) -> List[Component]:
         """按层面筛选元器件"""
-        return [comp for comp in self.components if comp.layer.lower() == layer.lower()]
+        layer_code = {'top': 0, 'bottom': 1}.get(layer.lower())
+        if layer_code is None or len(self.layer_id) != len(self.components):
+            return [comp for comp in self.components if comp.layer.lower() == layer.lower()]
+
+        # 层面比较在int8数组上向量化完成，只为命中行取回Component
+        indices = np.where(self.layer_id == layer_code)[0]
+        return [self.components[i] for i in indices]
     
     def filter_by_package(self, package_pattern: str) -> List[Component]:
         """按封装筛选元器件（支持正则表达式）"""
-        pattern = re.compile(package_pattern, re.IGNORECASE)
+        pattern = _compile_package_pattern(package_pattern)
+        if pattern is None:
+            # 纯字面量模式：大小写不敏感的子串查找
+            needle = package_pattern.lower()
+            return [comp for comp in self.components
+                    if needle in comp.package.lower()]
+
         return [comp for comp in self.components if pattern.search(comp.package)]
     
     def get_statistics(self) -> Dict[str, int]:
         """获取统计信息"""
+        # 封装和值的去重在同一次遍历中完成
+        packages = set()
+        values = set()
+        for comp in self.components:
+            packages.add(comp.package)
+            if comp.value:
+                values.add(comp.value)
+
         return {
             'total': len(self.components),
             'top': len(self.top_components),
             'bottom': len(self.bottom_components),
-            'packages': len(set(comp.package for comp in self.components)),
-            'unique_values': len(set(comp.value for comp in self.components if comp.value))
+            'packages': len(packages),
+            'unique_values': len(values)
         }
 
 
@@ -242,20 +407,14 @@ def test_parser():
 1,CN2,SD-V2,22.798,-0.898,Top,0,SD
 2,CN3,DP-8-18000,-9,37.5,Top,270,DP_SMD
 3,C1,C0603,78.389,19.541,Bottom,180,10uF"""
-    
-    # 写入临时文件
-    with open('test.csv', 'w', encoding='utf-8') as f:
-        f.write(test_csv)
-    
+
     try:
-        components = parser.parse_file('test.csv')
+        # 内存中的文件对象直接解析，测试不触碰磁盘
+        components = parser.parse_file(io.StringIO(test_csv))
         print(f"解析成功：{parser.get_statistics()}")
         print(f"Top层元器件：{len(components['top'])}")
         print(f"Bottom层元器件：{len(components['bottom'])}")
-        
-        # 清理临时文件
-        os.remove('test.csv')
-        
+
     except Exception as e:
         print(f"测试失败：{e}")
 
@@ -6,9 +6,11 @@ PCB位号图生成器演示脚本
 """
 
 import os
+import shutil
+import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-import time
 
 
 def print_header(title):
@@ -24,18 +26,41 @@ def print_step(step, description):
     print("-" * 40)
 
 
-def run_command(cmd, description=""):
-    """运行命令并显示结果"""
+# 演示产物集中在这些目录：汇总和清理都只看它们，
+# 不再从当前目录整树os.walk（dist/build等目录动辄上万个文件）
+DEMO_OUTPUT_DIRS = [
+    "demo_output", "demo_quality_low", "demo_quality_medium", "demo_quality_high",
+    "layout_test_output", "overlap_test_output", "final_test", "optimized_output",
+    "cli_test_output", "test_output", "layout_test"
+]
+
+
+def _iter_pdfs(root):
+    """递归扫描目录下的PDF，DirEntry缓存stat，每个文件一次系统调用"""
+    with os.scandir(root) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _iter_pdfs(entry.path)
+            elif entry.name.endswith('.pdf'):
+                yield Path(entry.path), entry.stat().st_size
+
+
+def run_command(argv, description=""):
+    """运行命令并显示结果
+
+    argv为参数列表，直接fork/exec子进程，不经过shell解析，
+    省去每次调用的/bin/sh进程开销。
+    """
     if description:
         print(f"执行: {description}")
-    print(f"命令: {cmd}")
-    
-    result = os.system(cmd)
-    if result == 0:
+    print(f"命令: {' '.join(argv)}")
+
+    result = subprocess.run(argv, check=False)
+    if result.returncode == 0:
         print("✅ 成功")
     else:
         print("❌ 失败")
-    return result == 0
+    return result.returncode == 0
 
 
 def demo_basic_usage():
@@ -43,19 +68,19 @@ def demo_basic_usage():
     print_header("基本用法演示")
     
     print_step(1, "生成所有类型的PDF")
-    run_command("python cli_main.py test_position.csv -o demo_output --verbose", 
+    run_command([sys.executable, "cli_main.py", "test_position.csv", "-o", "demo_output", "--verbose"], 
                 "使用测试数据生成完整的PDF文档")
     
     print_step(2, "只生成编号图")
-    run_command("python cli_main.py test_position.csv -o demo_output --refdes-only", 
+    run_command([sys.executable, "cli_main.py", "test_position.csv", "-o", "demo_output", "--refdes-only"], 
                 "只生成Reference Designator图")
     
     print_step(3, "只生成封装图")
-    run_command("python cli_main.py test_position.csv -o demo_output --package-only", 
+    run_command([sys.executable, "cli_main.py", "test_position.csv", "-o", "demo_output", "--package-only"], 
                 "只生成Package Layout图")
     
     print_step(4, "只生成值图")
-    run_command("python cli_main.py test_position.csv -o demo_output --value-only", 
+    run_command([sys.executable, "cli_main.py", "test_position.csv", "-o", "demo_output", "--value-only"], 
                 "只生成Component Value图")
 
 
@@ -64,7 +89,7 @@ def demo_layout_optimization():
     print_header("布局优化演示")
     
     print_step(1, "密集布局测试")
-    run_command("python test_layout.py", 
+    run_command([sys.executable, "test_layout.py"], 
                 "测试密集排列元器件的布局算法")
     
     print_step(2, "检查生成的文件")
@@ -87,7 +112,7 @@ def demo_quality_options():
     for quality in qualities:
         print_step(qualities.index(quality) + 1, f"生成{quality}质量PDF")
         output_dir = f"demo_quality_{quality}"
-        run_command(f"python cli_main.py test_position.csv -o {output_dir} --quality {quality} --refdes-only", 
+        run_command([sys.executable, "cli_main.py", "test_position.csv", "-o", output_dir, "--quality", quality, "--refdes-only"],
                     f"生成{quality}质量的PDF文件")
         
         # 检查文件大小
@@ -103,10 +128,10 @@ def demo_help_and_options():
     print_header("帮助和选项演示")
     
     print_step(1, "显示帮助信息")
-    run_command("python cli_main.py --help", "查看所有可用选项")
+    run_command([sys.executable, "cli_main.py", "--help"], "查看所有可用选项")
     
     print_step(2, "显示版本信息")
-    run_command("python cli_main.py --version", "查看程序版本")
+    run_command([sys.executable, "cli_main.py", "--version"], "查看程序版本")
 
 
 def show_file_summary():
@@ -114,22 +139,22 @@ def show_file_summary():
     print_header("生成文件总结")
     
     all_pdfs = []
-    for root, dirs, files in os.walk("."):
-        for file in files:
-            if file.endswith(".pdf"):
-                file_path = Path(root) / file
-                all_pdfs.append(file_path)
-    
+    for dir_name in DEMO_OUTPUT_DIRS:
+        if os.path.isdir(dir_name):
+            all_pdfs.extend(_iter_pdfs(dir_name))
+
     if all_pdfs:
-        print(f"总共生成了 {len(all_pdfs)} 个PDF文件:")
-        
+        # 汇总行先在内存拼好再一次性输出，避免逐文件一次write
+        lines = [f"总共生成了 {len(all_pdfs)} 个PDF文件:"]
+
         total_size = 0
-        for pdf_file in sorted(all_pdfs):
-            size_kb = pdf_file.stat().st_size / 1024
+        for pdf_file, size in sorted(all_pdfs):
+            size_kb = size / 1024
             total_size += size_kb
-            print(f"  📄 {pdf_file}: {size_kb:.1f} KB")
-        
-        print(f"\n总大小: {total_size:.1f} KB ({total_size/1024:.1f} MB)")
+            lines.append(f"  📄 {pdf_file}: {size_kb:.1f} KB")
+
+        lines.append(f"\n总大小: {total_size:.1f} KB ({total_size/1024:.1f} MB)")
+        print('\n'.join(lines))
     else:
         print("没有找到PDF文件")
 
@@ -151,31 +176,26 @@ def demo_features():
         "✅ 独立可执行文件"
     ]
     
-    for feature in features:
-        print(f"  {feature}")
-        time.sleep(0.1)  # 动画效果
+    # 整段一次输出：一次write系统调用，也免去逐行sleep的动画等待
+    print('\n'.join(f"  {feature}" for feature in features))
 
 
 def cleanup_demo_files():
     """清理演示文件"""
     print_header("清理演示文件")
     
-    demo_dirs = [
-        "demo_output", "demo_quality_low", "demo_quality_medium", "demo_quality_high",
-        "layout_test_output", "overlap_test_output", "final_test", "optimized_output",
-        "cli_test_output", "test_output", "layout_test"
-    ]
-    
-    cleaned = 0
-    for dir_name in demo_dirs:
-        if os.path.exists(dir_name):
-            import shutil
-            shutil.rmtree(dir_name)
+    existing = [d for d in DEMO_OUTPUT_DIRS if os.path.exists(d)]
+
+    # rmtree的unlink风暴在等待内核时释放GIL，
+    # 线程池并行删除多个目录树可以重叠这些系统调用
+    if existing:
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            list(executor.map(shutil.rmtree, existing))
+        for dir_name in existing:
             print(f"🗑️  删除目录: {dir_name}")
-            cleaned += 1
-    
-    if cleaned > 0:
-        print(f"\n清理完成，删除了 {cleaned} 个目录")
+
+    if existing:
+        print(f"\n清理完成，删除了 {len(existing)} 个目录")
     else:
         print("没有需要清理的文件")
 
@@ -5,21 +5,25 @@
 提供统一的错误处理和用户友好的错误信息
 """
 
+import atexit
+import queue
 import sys
 import traceback
 import logging
+import logging.handlers
 from typing import Optional, Callable, Any
-from functools import wraps
+from functools import cache, wraps
 
-# 尝试导入tkinter，如果失败则设置为None
-try:
-    import tkinter as tk
-    from tkinter import messagebox
-    HAS_TKINTER = True
-except ImportError:
-    tk = None
-    messagebox = None
-    HAS_TKINTER = False
+# tkinter延迟到真正弹窗时再导入：本模块在main.py顶部就被导入，
+# 若在这里就加载Tcl/Tk，CLI和测试进程也会白白初始化GUI栈
+@cache
+def _get_messagebox():
+    """按需导入tkinter.messagebox，不可用时返回None"""
+    try:
+        from tkinter import messagebox
+        return messagebox
+    except ImportError:
+        return None
 
 
 class ErrorHandler:
@@ -31,24 +35,31 @@ class ErrorHandler:
     
     def setup_logging(self):
         """设置日志"""
-        log_format = '%(asctime)s - %(levelname)s - %(message)s'
-        
+        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(formatter)
+
+        targets = [stream_handler]
         if self.log_file:
-            logging.basicConfig(
-                level=logging.INFO,
-                format=log_format,
-                handlers=[
-                    logging.FileHandler(self.log_file, encoding='utf-8'),
-                    logging.StreamHandler(sys.stdout)
-                ]
-            )
-        else:
-            logging.basicConfig(
-                level=logging.INFO,
-                format=log_format,
-                handlers=[logging.StreamHandler(sys.stdout)]
-            )
-        
+            file_handler = logging.FileHandler(self.log_file, encoding='utf-8')
+            file_handler.setFormatter(formatter)
+            targets.insert(0, file_handler)
+
+        # 记录日志只需一次入队即返回；格式化和stdout/文件双路写出
+        # 都在后台监听线程里完成，热路径上不再有同步I/O和锁等待
+        log_queue = queue.Queue(-1)
+        self._listener = logging.handlers.QueueListener(log_queue, *targets)
+        self._listener.start()
+        atexit.register(self._listener.stop)
+
+        # 入队侧只透传原始消息，格式化完全交给监听线程的目标处理器
+        # （basicConfig会给无格式器的处理器配默认格式，需显式覆盖）
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.setFormatter(logging.Formatter('%(message)s'))
+
+        logging.basicConfig(level=logging.INFO, handlers=[queue_handler])
+
         self.logger = logging.getLogger(__name__)
     
     def handle_exception(self, exc_type, exc_value, exc_traceback):
@@ -63,7 +74,8 @@ class ErrorHandler:
         # 显示用户友好的错误消息
         user_msg = self.get_user_friendly_message(exc_type, exc_value)
         try:
-            if HAS_TKINTER and messagebox:
+            messagebox = _get_messagebox()
+            if messagebox:
                 messagebox.showerror("程序错误", user_msg)
             else:
                 print(f"错误: {user_msg}")
@@ -109,7 +121,8 @@ def handle_errors(error_handler: Optional[ErrorHandler] = None):
                     error_handler.logger.error(f"函数 {func.__name__} 执行错误: {str(e)}")
                     user_msg = error_handler.get_user_friendly_message(type(e), e)
                     try:
-                        if HAS_TKINTER and messagebox:
+                        messagebox = _get_messagebox()
+                        if messagebox:
                             messagebox.showerror("错误", user_msg)
                         else:
                             print(f"错误: {user_msg}")
@@ -186,8 +199,14 @@ def validate_output_directory(dir_path: str) -> bool:
     return True
 
 
+@cache
 def check_dependencies() -> bool:
-    """检查依赖库"""
+    """检查依赖库
+
+    结果缓存：依赖集在进程生命周期内不变，重复实例化主窗口或
+    测试多次调用时不再逐个重新__import__。失败（抛ImportError）
+    不会被缓存，修复环境后重试仍然生效。
+    """
     required_modules = [
         ('matplotlib', 'matplotlib'),
         ('numpy', 'numpy'),
@@ -5,11 +5,19 @@
 允许用户轻松调整PDF生成器的字体大小设置
 """
 
+import re
 import sys
+from dataclasses import dataclass
 from pathlib import Path
+from types import MappingProxyType
 from config import Config
 
 
+# 一次编译、整文件单趟替换三个字体字段的数值，保留行内注释
+_FONT_RE = re.compile(
+    r'^(\s*)((?:base|min|max)_font_size:\s*int\s*=\s*)\d+', re.M)
+
+
 def show_current_settings():
     """显示当前字体设置"""
     config = Config()
@@ -21,47 +29,40 @@ def show_current_settings():
     print()
 
 
+@dataclass(frozen=True, slots=True)
+class FontPreset:
+    """一组预设的字体大小及其适用场景说明"""
+    base: int
+    min: int
+    max: int
+    description: str
+
+
+# 预设字体大小建议：纯静态数据，模块加载时构建一次，
+# 各入口（--list/--set/交互式）共享同一份只读映射；
+# 条目用slots冻结dataclass，属性访问无字符串哈希开销
+_RECOMMENDATIONS = MappingProxyType({
+    "极小字体 (密集布局)": FontPreset(
+        4, 2, 6, "适用于元器件非常密集的PCB，字体很小但仍可读"),
+    "小字体 (默认)": FontPreset(
+        6, 3, 8, "原始默认设置，适用于大多数PCB布局"),
+    "平衡字体 (推荐)": FontPreset(
+        7, 4, 10, "平衡字体大小，在可读性和重叠避免之间的最佳选择"),
+    "中等字体": FontPreset(
+        8, 5, 12, "增大的字体，更易读，适用于中等密度布局"),
+    "大字体 (稀疏布局)": FontPreset(
+        10, 7, 15, "大字体，适用于元器件稀疏的PCB"),
+    "超大字体 (演示用)": FontPreset(
+        12, 9, 18, "超大字体，适用于演示或打印大尺寸图纸"),
+})
+
+# 预设名称元组，避免每次调用list(keys())重建列表
+_OPTION_KEYS = tuple(_RECOMMENDATIONS)
+
+
 def get_font_size_recommendations():
     """获取字体大小建议"""
-    recommendations = {
-        "极小字体 (密集布局)": {
-            "base_font_size": 4,
-            "min_font_size": 2,
-            "max_font_size": 6,
-            "description": "适用于元器件非常密集的PCB，字体很小但仍可读"
-        },
-        "小字体 (默认)": {
-            "base_font_size": 6,
-            "min_font_size": 3,
-            "max_font_size": 8,
-            "description": "原始默认设置，适用于大多数PCB布局"
-        },
-        "平衡字体 (推荐)": {
-            "base_font_size": 7,
-            "min_font_size": 4,
-            "max_font_size": 10,
-            "description": "平衡字体大小，在可读性和重叠避免之间的最佳选择"
-        },
-        "中等字体": {
-            "base_font_size": 8,
-            "min_font_size": 5,
-            "max_font_size": 12,
-            "description": "增大的字体，更易读，适用于中等密度布局"
-        },
-        "大字体 (稀疏布局)": {
-            "base_font_size": 10,
-            "min_font_size": 7,
-            "max_font_size": 15,
-            "description": "大字体，适用于元器件稀疏的PCB"
-        },
-        "超大字体 (演示用)": {
-            "base_font_size": 12,
-            "min_font_size": 9,
-            "max_font_size": 18,
-            "description": "超大字体，适用于演示或打印大尺寸图纸"
-        }
-    }
-    return recommendations
+    return _RECOMMENDATIONS
 
 
 def apply_font_settings(base_size, min_size, max_size):
@@ -72,27 +73,17 @@ def apply_font_settings(base_size, min_size, max_size):
         print("错误: 找不到config.py文件")
         return False
     
-    # 读取配置文件
-    with open(config_file, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # 替换字体设置
-    lines = content.split('\n')
-    new_lines = []
-    
-    for line in lines:
-        if 'base_font_size:' in line and 'int' in line:
-            new_lines.append(f"    base_font_size: int = {base_size}  # 基础字体大小")
-        elif 'min_font_size:' in line and 'int' in line:
-            new_lines.append(f"    min_font_size: int = {min_size}   # 最小字体大小")
-        elif 'max_font_size:' in line and 'int' in line:
-            new_lines.append(f"    max_font_size: int = {max_size}  # 最大字体大小")
-        else:
-            new_lines.append(line)
-    
-    # 写回文件
-    with open(config_file, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(new_lines))
+    # 整文件一次读入/写回，绕过缓冲IO层的分块循环
+    content = config_file.read_text(encoding='utf-8')
+
+    # 单趟正则替换三个字段的数值：不再按行切分、逐行做多次子串
+    # 扫描再重新join，行首缩进和行尾注释原样保留
+    sizes = {'base': base_size, 'min': min_size, 'max': max_size}
+    new_content = _FONT_RE.sub(
+        lambda m: f"{m.group(1)}{m.group(2)}{sizes[m.group(2).split('_')[0]]}",
+        content)
+
+    config_file.write_text(new_content, encoding='utf-8')
     
     print(f"✓ 字体设置已更新:")
     print(f"  基础字体: {base_size} pt")
@@ -113,24 +104,28 @@ def interactive_config():
     print("预设字体大小选项:")
     print("-" * 30)
     
-    options = list(recommendations.keys())
-    for i, option in enumerate(options, 1):
-        settings = recommendations[option]
+    # 直接遍历items()拿到每个预设，菜单编号常量只算一次
+    options = _OPTION_KEYS
+    for i, (option, settings) in enumerate(recommendations.items(), 1):
         print(f"{i}. {option}")
-        print(f"   基础: {settings['base_font_size']} pt, "
-              f"最小: {settings['min_font_size']} pt, "
-              f"最大: {settings['max_font_size']} pt")
-        print(f"   说明: {settings['description']}")
+        print(f"   基础: {settings.base} pt, "
+              f"最小: {settings.min} pt, "
+              f"最大: {settings.max} pt")
+        print(f"   说明: {settings.description}")
         print()
-    
-    print(f"{len(options) + 1}. 自定义设置")
-    print(f"{len(options) + 2}. 退出")
+
+    n = len(options)
+    custom_choice = n + 1
+    exit_choice = n + 2
+
+    print(f"{custom_choice}. 自定义设置")
+    print(f"{exit_choice}. 退出")
     print()
-    
+
     try:
-        choice = int(input("请选择 (1-{}): ".format(len(options) + 2)))
-        
-        if 1 <= choice <= len(options):
+        choice = int(input(f"请选择 (1-{exit_choice}): "))
+
+        if 1 <= choice <= n:
             # 应用预设
             option_name = options[choice - 1]
             settings = recommendations[option_name]
@@ -139,16 +134,12 @@ def interactive_config():
             confirm = input("确认应用此设置? (y/N): ").lower()
             
             if confirm in ['y', 'yes']:
-                apply_font_settings(
-                    settings['base_font_size'],
-                    settings['min_font_size'],
-                    settings['max_font_size']
-                )
+                apply_font_settings(settings.base, settings.min, settings.max)
                 print("\n设置已应用！重新运行PDF生成器以查看效果。")
             else:
                 print("取消设置。")
                 
-        elif choice == len(options) + 1:
+        elif choice == custom_choice:
             # 自定义设置
             print("\n自定义字体设置:")
             base = int(input("基础字体大小 (pt): "))
@@ -161,7 +152,7 @@ def interactive_config():
             else:
                 print("错误: 字体大小必须满足 最小 <= 基础 <= 最大")
                 
-        elif choice == len(options) + 2:
+        elif choice == exit_choice:
             print("退出配置工具。")
             
         else:
@@ -175,19 +166,13 @@ def interactive_config():
 
 def quick_set(preset_name):
     """快速设置预设字体大小"""
-    recommendations = get_font_size_recommendations()
-    
-    if preset_name not in recommendations:
+    # 直接引用模块常量：预设字典是静态的，无需经过访问函数
+    settings = _RECOMMENDATIONS.get(preset_name)
+    if settings is None:
         print(f"错误: 未知的预设名称 '{preset_name}'")
-        print("可用预设:", list(recommendations.keys()))
+        print("可用预设:", list(_OPTION_KEYS))
         return False
-    
-    settings = recommendations[preset_name]
-    apply_font_settings(
-        settings['base_font_size'],
-        settings['min_font_size'],
-        settings['max_font_size']
-    )
+    apply_font_settings(settings.base, settings.min, settings.max)
     return True
 
 
@@ -199,7 +184,7 @@ def main():
             recommendations = get_font_size_recommendations()
             print("可用的字体预设:")
             for name, settings in recommendations.items():
-                print(f"  {name}: {settings['description']}")
+                print(f"  {name}: {settings.description}")
         elif sys.argv[1] == "--set" and len(sys.argv) > 2:
             preset_name = sys.argv[2]
             if quick_set(preset_name):
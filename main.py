@@ -5,12 +5,11 @@ PCB元器件位号图生成器
 支持从CSV文件生成PCB正反面的位号图PDF文件
 """
 
-import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-import threading
+import queue
 from typing import Optional
 
 # 导入自定义模块
@@ -22,11 +21,52 @@ from error_handler import (
     validate_csv_file, validate_output_directory, check_dependencies
 )
 
+# tkinter延迟到真正创建窗口时再导入：加载Tk动态库和初始化
+# Tcl解释器的开销只让GUI路径承担，其他模块导入PCBLayoutGenerator
+# （如测试或CLI）不再触发
+tk = None
+ttk = None
+filedialog = None
+messagebox = None
+
+
+def _load_tkinter():
+    """按需导入tkinter并填充模块级引用"""
+    global tk, ttk, filedialog, messagebox
+    if tk is None:
+        import tkinter as _tk
+        from tkinter import ttk as _ttk, filedialog as _fd, messagebox as _mb
+        tk, ttk, filedialog, messagebox = _tk, _ttk, _fd, _mb
+
+
+# 界面"说明"区域的静态文本：模块级常量，setup_ui每次
+# 实例化时直接引用，不再重建字符串
+_INFO_CONTENT = """程序功能说明：
+
+1. 选择包含PCB元器件位置信息的CSV文件
+2. 选择PDF文件的输出目录
+3. 选择要生成的图纸类型（编号、封装、值）
+4. 程序将自动生成正面(Top)和反面(Bottom)的位号图
+5. 生成的PDF文件将保存在输出目录下的CSV同名子目录中
+
+CSV文件格式要求：
+- 第一行为标题行：Num,RefDes,PartDecal,X,Y,Layer,Orient.,value
+- 数据行包含：序号、编号、封装、X坐标、Y坐标、层面、角度、值
+- 层面字段支持：Top（正面）、Bottom（反面）
+
+生成的文件：
+- RefDes_Top.pdf / RefDes_Bottom.pdf（编号图）
+- Package_Top.pdf / Package_Bottom.pdf（封装图）  
+- Value_Top.pdf / Value_Bottom.pdf（值图）"""
+
 
 class PCBLayoutGenerator:
     """PCB位号图生成器主程序"""
-    
+
     def __init__(self):
+        # 先加载GUI库，再做其余初始化
+        _load_tkinter()
+
         # 初始化错误处理器
         self.error_handler = get_error_handler()
 
@@ -54,11 +94,23 @@ class PCBLayoutGenerator:
         self.progress_var = tk.DoubleVar()
         self.status_var = tk.StringVar(value="就绪")
 
+        # 进度更新走队列：工作线程只入队，主线程定时抽干，
+        # 不再为每次进度变化向Tk事件循环投递一个回调
+        self._progress_q = queue.SimpleQueue()
+
+        # 常驻后台执行器：多次点击"生成PDF"复用同一工作线程，
+        # 不再每次点击都pthread_create一个新daemon线程
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
+
         # 初始化界面
         self.setup_ui()
 
         # 设置默认输出目录为当前目录
         self.output_dir_path.set(os.getcwd())
+
+        # 启动进度队列轮询
+        self.root.after(100, self._drain_progress)
     
     def setup_ui(self):
         """设置用户界面"""
@@ -111,7 +163,9 @@ class PCBLayoutGenerator:
         info_frame.columnconfigure(0, weight=1)
         info_frame.rowconfigure(0, weight=1)
         
-        info_text = tk.Text(info_frame, height=8, wrap=tk.WORD, state="disabled")
+        # 文本框先以可写状态创建，插入常量文本后一次性置为只读，
+        # 省去"disabled→normal→disabled"的两次状态切换
+        info_text = tk.Text(info_frame, height=8, wrap=tk.WORD)
         info_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         
         # 添加滚动条
@@ -120,26 +174,7 @@ class PCBLayoutGenerator:
         info_text.configure(yscrollcommand=scrollbar.set)
         
         # 插入说明文本
-        info_content = """程序功能说明：
-
-1. 选择包含PCB元器件位置信息的CSV文件
-2. 选择PDF文件的输出目录
-3. 选择要生成的图纸类型（编号、封装、值）
-4. 程序将自动生成正面(Top)和反面(Bottom)的位号图
-5. 生成的PDF文件将保存在输出目录下的CSV同名子目录中
-
-CSV文件格式要求：
-- 第一行为标题行：Num,RefDes,PartDecal,X,Y,Layer,Orient.,value
-- 数据行包含：序号、编号、封装、X坐标、Y坐标、层面、角度、值
-- 层面字段支持：Top（正面）、Bottom（反面）
-
-生成的文件：
-- RefDes_Top.pdf / RefDes_Bottom.pdf（编号图）
-- Package_Top.pdf / Package_Bottom.pdf（封装图）  
-- Value_Top.pdf / Value_Bottom.pdf（值图）"""
-        
-        info_text.configure(state="normal")
-        info_text.insert("1.0", info_content)
+        info_text.insert("1.0", _INFO_CONTENT)
         info_text.configure(state="disabled")
         
         # 控制按钮区域
@@ -179,11 +214,15 @@ CSV文件格式要求：
     def validate_inputs(self) -> bool:
         """验证输入参数"""
         try:
+            # 每个Tk变量只做一次Tcl_GetVar往返
+            csv_file = self.csv_file_path.get()
+            output_dir = self.output_dir_path.get()
+
             # 验证CSV文件
-            validate_csv_file(self.csv_file_path.get())
+            validate_csv_file(csv_file)
 
             # 验证输出目录
-            validate_output_directory(self.output_dir_path.get())
+            validate_output_directory(output_dir)
 
             # 验证生成选项
             if not (self.generate_refdes.get() or self.generate_package.get() or self.generate_value.get()):
@@ -208,76 +247,94 @@ CSV文件格式要求：
         self.progress_var.set(0)
         self.status_var.set("正在生成...")
         
-        # 在新线程中执行生成任务
-        thread = threading.Thread(target=self.generate_pdfs)
-        thread.daemon = True
-        thread.start()
+        # 提交到常驻执行器，在后台线程中执行生成任务
+        self._executor.submit(self.generate_pdfs)
     
     def generate_pdfs(self):
         """生成PDF文件（在后台线程中执行）"""
         try:
-            # 解析CSV文件
+            # 解析CSV文件：路径对象只构造一次，解析和输出目录共用
+            csv_path = Path(self.csv_file_path.get())
             self.update_progress(10, "正在解析CSV文件...")
             parser = CSVParser()
-            components = parser.parse_file(self.csv_file_path.get())
-            
+            components = parser.parse_file(csv_path)
+
             # 创建输出目录
-            csv_filename = Path(self.csv_file_path.get()).stem
-            output_dir = Path(self.output_dir_path.get()) / csv_filename
+            output_dir = Path(self.output_dir_path.get()) / csv_path.stem
             output_dir.mkdir(exist_ok=True)
             
-            # 初始化PDF生成器
-            generator = PDFGenerator(self.config)
-            
-            # 计算总任务数
-            total_tasks = 0
-            if self.generate_refdes.get():
-                total_tasks += 2  # Top + Bottom
-            if self.generate_package.get():
-                total_tasks += 2
-            if self.generate_value.get():
-                total_tasks += 2
-            
-            current_task = 0
-            
-            # 生成编号图
-            if self.generate_refdes.get():
-                self.update_progress(20 + (current_task * 60 // total_tasks), "正在生成编号图...")
-                generator.generate_refdes_pdf(components, output_dir)
-                current_task += 2
-            
-            # 生成封装图
-            if self.generate_package.get():
-                self.update_progress(20 + (current_task * 60 // total_tasks), "正在生成封装图...")
-                generator.generate_package_pdf(components, output_dir)
-                current_task += 2
-            
-            # 生成值图
-            if self.generate_value.get():
-                self.update_progress(20 + (current_task * 60 // total_tasks), "正在生成值图...")
-                generator.generate_value_pdf(components, output_dir)
-                current_task += 2
-            
+            # 三个几乎相同的if分支合并成任务表+循环，
+            # 进度步长只做一次整除而不是每个分支重算
+            tasks = [
+                (self.generate_refdes.get(), "正在生成编号图...",
+                 'generate_refdes_pdf'),
+                (self.generate_package.get(), "正在生成封装图...",
+                 'generate_package_pdf'),
+                (self.generate_value.get(), "正在生成值图...",
+                 'generate_value_pdf'),
+            ]
+            tasks = [(status, task) for enabled, status, task in tasks if enabled]
+            step = 60 // len(tasks) if tasks else 0
+
+            # 三类图互相独立，matplotlib的大块绘制和PDF写出在C层释放
+            # GIL，线程池重叠生成。每个任务用独立的PDFGenerator实例，
+            # 布局跟踪状态（text_positions等）不跨线程共享；
+            # Tk更新仍经root.after回主线程
+            if tasks:
+                self.update_progress(20, "正在生成图纸...")
+                with ThreadPoolExecutor(max_workers=min(3, len(tasks))) as executor:
+                    futures = [
+                        executor.submit(getattr(PDFGenerator(self.config), task),
+                                        components, output_dir)
+                        for _, task in tasks]
+                    for done, future in enumerate(as_completed(futures), 1):
+                        future.result()  # 让工作线程的异常在此重新抛出
+                        self.update_progress(
+                            20 + done * step, f"图纸生成中 ({done}/{len(tasks)})...")
+
+
             self.update_progress(100, "生成完成！")
-            
-            # 显示成功消息
-            self.root.after(0, lambda: messagebox.showinfo(
-                "成功", f"PDF文件已生成完成！\n输出目录：{output_dir}"
+
+            # 成功弹窗和按钮恢复合并为一次回调入队
+            self.root.after(0, lambda: (
+                messagebox.showinfo(
+                    "成功", f"PDF文件已生成完成！\n输出目录：{output_dir}"),
+                self.generate_button.configure(state="normal")
             ))
-            
+
         except Exception as e:
             error_msg = f"生成PDF时发生错误：{str(e)}"
-            self.root.after(0, lambda: messagebox.showerror("错误", error_msg))
             self.update_progress(0, "生成失败")
-        
-        finally:
-            # 重新启用生成按钮
-            self.root.after(0, lambda: self.generate_button.configure(state="normal"))
-    
+            self.root.after(0, lambda: (
+                messagebox.showerror("错误", error_msg),
+                self.generate_button.configure(state="normal")
+            ))
+
+    def _on_close(self):
+        """窗口关闭：先停掉后台执行器，再销毁窗口"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
+
+    def _drain_progress(self):
+        """主线程每100ms抽干进度队列，只把最新一条应用到界面"""
+        latest = None
+        while True:
+            try:
+                latest = self._progress_q.get_nowait()
+            except queue.Empty:
+                break
+        if latest is not None:
+            self.progress_var.set(latest[0])
+            self.status_var.set(latest[1])
+        self.root.after(100, self._drain_progress)
+
     def update_progress(self, value: float, status: str):
-        """更新进度条和状态"""
-        self.root.after(0, lambda: self.progress_var.set(value))
-        self.root.after(0, lambda: self.status_var.set(status))
+        """更新进度条和状态
+
+        工作线程只做一次入队即返回，无lambda、无Tk事件循环往返；
+        界面刷新频率由_drain_progress的轮询周期决定。
+        """
+        self._progress_q.put((value, status))
     
     def run(self):
         """运行程序"""
@@ -290,7 +347,11 @@ def main():
         app = PCBLayoutGenerator()
         app.run()
     except Exception as e:
-        messagebox.showerror("致命错误", f"程序启动失败：{str(e)}")
+        # tkinter可能尚未成功加载（如无显示环境），退回到stderr
+        if messagebox is not None:
+            messagebox.showerror("致命错误", f"程序启动失败：{str(e)}")
+        else:
+            print(f"致命错误: 程序启动失败：{str(e)}", file=sys.stderr)
         sys.exit(1)
 
 
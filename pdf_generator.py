@@ -8,7 +8,13 @@ PDF生成模块
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
 from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.collections import PatchCollection
+from matplotlib.figure import Figure
+from matplotlib.font_manager import FontProperties
+from matplotlib.textpath import TextPath
 import numpy as np
+from functools import lru_cache
+from operator import attrgetter
 from typing import List, Dict, Tuple, Optional
 from pathlib import Path
 import math
@@ -17,6 +23,115 @@ from csv_parser import Component
 from config import Config
 
 
+def _min_pairwise_distance(xy: np.ndarray) -> float:
+    """均匀网格分桶求最近点对距离，期望O(N)
+
+    以格边长h作为最小间距的上界估计：若某趟扫描在同格或相邻格里
+    找到距离小于h的点对，则全局最近对也必落在某个3x3邻域内，结果
+    即为全局最小；否则h加倍重试。点大量重合时返回inf（与旧实现
+    跳过零距离的语义一致）。
+    """
+    n = len(xy)
+    if n < 2:
+        return math.inf
+
+    # 小规模直接整矩阵广播，省去分桶开销
+    if n <= 64:
+        diff = xy[:, None, :] - xy[None, :, :]
+        d2 = (diff * diff).sum(-1)
+        d2[d2 == 0.0] = np.inf
+        return math.sqrt(d2.min()) if np.isfinite(d2.min()) else math.inf
+
+    origin = xy.min(0)
+    span = float((xy.max(0) - origin).max())
+    if span <= 0.0:
+        return math.inf  # 所有点重合
+
+    # 初始格长按均匀分布下的期望点距估计
+    h = span / max(math.isqrt(n), 1)
+    while True:
+        cells = {}
+        idx = np.floor_divide(xy - origin, h).astype(np.int64)
+        for i, key in enumerate(map(tuple, idx)):
+            cells.setdefault(key, []).append(i)
+
+        best2 = np.inf
+        for (cx, cy), members in cells.items():
+            neigh = []
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    neigh.extend(cells.get((cx + dx, cy + dy), ()))
+            pts = xy[members]
+            nb = xy[neigh]
+            diff = pts[:, None, :] - nb[None, :, :]
+            d2 = (diff * diff).sum(-1)
+            d2[d2 == 0.0] = np.inf
+            best2 = min(best2, float(d2.min()))
+
+        if np.isfinite(best2) and best2 < h * h:
+            return math.sqrt(best2)
+        if len(cells) == 1:
+            # 单格已覆盖全部点对，结果即为精确值
+            return math.sqrt(best2) if np.isfinite(best2) else math.inf
+        h *= 2.0
+
+
+# 常见封装尺寸映射（毫米），模块加载时构建一次
+_PACKAGE_SIZE_MAP = {
+    'c0201': (0.6, 0.3),
+    'c0402': (1.0, 0.5),
+    'c0603': (1.6, 0.8),
+    'c0805': (2.0, 1.25),
+    'c1206': (3.2, 1.6),
+    'r0201': (0.6, 0.3),
+    'r0402': (1.0, 0.5),
+    'r0603': (1.6, 0.8),
+    'r0805': (2.0, 1.25),
+    'r1206': (3.2, 1.6),
+    'sot23': (2.9, 1.3),
+    'sot23-5': (2.9, 1.6),
+    'sot23-6': (2.9, 1.6),
+    'sop8': (5.0, 4.0),
+    'qfn': (5.0, 5.0),
+    'qfn16': (3.0, 3.0),
+    'qfn48': (7.0, 7.0),
+    'qfn64': (9.0, 9.0),
+    'usb': (12.0, 8.0),
+    'hdmi': (15.0, 12.0),
+}
+
+# 图纸类型到标签取值函数的映射：一次字典查找代替逐元器件的
+# 三连字符串比较；未知类型回退到编号
+_FIELD_GETTERS = {
+    'refdes': attrgetter('refdes'),
+    'package': attrgetter('package'),
+    'value': lambda c: c.value if c.value else 'N/A',
+}
+
+
+_LABEL_FONT = FontProperties(weight='bold')
+
+
+@lru_cache(maxsize=8192)
+def _text_width(text: str, text_size: float) -> float:
+    """按实际字形测量文本宽度（pt），结果按(文本, 字号)缓存
+
+    统一的len(text)*字号*0.55估算对窄文本（如"C1"）明显偏宽，
+    会把保留框撑大、迫使重叠搜索跑得更远；TextPath一次真实测量
+    后缓存，同名标签和三类图纸间全部复用。
+    """
+    if not text:
+        return 0.0
+    return float(TextPath((0, 0), text, size=text_size,
+                          prop=_LABEL_FONT).get_extents().width)
+
+
+# 螺旋搜索的角度步进固定为π/12，三角函数表在模块加载时算好
+_SPIRAL_ANGLES = np.arange(0, 2 * np.pi, np.pi / 12)
+_SPIRAL_COS = np.cos(_SPIRAL_ANGLES)
+_SPIRAL_SIN = np.sin(_SPIRAL_ANGLES)
+
+
 class PDFGenerator:
     """PDF生成器"""
     
@@ -31,6 +146,34 @@ class PDFGenerator:
         self.figure_size = (11.69, 8.27)  # A4横向尺寸（英寸）
         self.dpi = 300
         self.margin = 0.5  # 边距（英寸）
+
+        # 文本位置跟踪及其网格索引（每张图重建）。位置只存进
+        # 按几何倍数增长的连续float64数组（长度计数_pos_n），
+        # 精确重叠判断整批下推到numpy的C循环里做
+        self._pos_n = 0
+        self._text_grid = {}
+        self._grid_cell = 1.0
+        self._positions_arr = np.empty((64, 4), dtype=np.float64)
+
+        # 螺旋候选偏移表缓存：同一张图里文字大小统一，
+        # 绝大多数调用共享同一组(步长, 最大半径)
+        self._spiral_cache_key = None
+        self._spiral_cache = None
+
+        # 按层缓存的几何布局（见_compute_layout）
+        self._layout_cache = {}
+
+        # 复用的文本框样式：不再为每个标签新建dict并让matplotlib
+        # 重新解析boxstyle字符串
+        self._text_bbox_style = dict(boxstyle='round,pad=0.2',
+                                     facecolor=self.config.text_background_color,
+                                     alpha=self.config.text_background_alpha,
+                                     edgecolor='none')
+        self._label_bbox_style = dict(boxstyle='round,pad=0.05',
+                                      facecolor='white', alpha=0.9,
+                                      edgecolor='black', linewidth=0.2)
+        self._info_bbox_style = dict(boxstyle='round,pad=0.5',
+                                     facecolor='lightyellow', alpha=0.8)
     
     def generate_refdes_pdf(self, components: Dict[str, List[Component]], output_dir: Path):
         """生成编号图PDF"""
@@ -64,24 +207,80 @@ class PDFGenerator:
                     f"PCB {title_suffix} - {layer_names[layer]} Layer"
                 )
                 pdf.savefig(fig, dpi=self.dpi, bbox_inches='tight')
-                plt.close(fig)
     
     def _create_layout_figure(self, components: List[Component], field_name: str, title: str):
-        """创建位号图"""
-        if not components:
-            # 创建空图
-            fig, ax = plt.subplots(figsize=self.figure_size)
-            ax.text(0.5, 0.5, 'No components on this layer', ha='center', va='center',
-                   transform=ax.transAxes, fontsize=16)
-            ax.set_title(title, fontsize=14, fontweight='bold')
-            return fig
+        """创建位号图（调用方保证components非空，空层在_generate_pdf已跳过）"""
+        # 几何布局（边界、文字大小、封装尺寸）按层缓存：三类图
+        # 只有标签文本不同，同一层的第二、三张图直接复用
+        layout = self._compute_layout(components)
+        plot_min_x, plot_max_x, plot_min_y, plot_max_y = layout['extents']
+        text_size = layout['text_size']
+
+        # 创建图形：直接实例化Figure，不经过pyplot的全局图形
+        # 注册表（线程不安全，且需要手动plt.close防泄漏）
+        fig = Figure(figsize=self.figure_size)
+        ax = fig.add_subplot()
+
+        # 设置坐标轴
+        ax.set_xlim(plot_min_x, plot_max_x)
+        ax.set_ylim(plot_min_y, plot_max_y)
+        ax.set_aspect('equal')
+        ax.grid(True, alpha=self.config.grid_alpha, linestyle='-', linewidth=0.5)
+        ax.set_xlabel('X (mm)', fontsize=10)
+        ax.set_ylabel('Y (mm)', fontsize=10)
+        ax.set_title(title, fontsize=14, fontweight='bold', pad=20)
+
+        # 添加次要网格
+        ax.grid(True, which='minor', alpha=self.config.grid_alpha * 0.5, linestyle=':', linewidth=0.3)
+        ax.minorticks_on()
+
+        # 初始化文本位置跟踪：占用检测走均匀网格索引，
+        # 格长取典型文本框高度的若干倍，长文本框会跨格登记
+        self._pos_n = 0
+        self._text_grid = {}
+        self._grid_cell = max(1.0, text_size * 4.0)
+        if len(self._positions_arr) < len(components):
+            self._positions_arr = np.empty((len(components), 4), dtype=np.float64)
+
+        if len(components) > self.config.raster_threshold:
+            # 极高密度板：全部标签栅格化进一张离屏位图，整层文本
+            # 只是一个imshow图元，矢量文本的逐图元开销完全消失
+            self._draw_labels_raster(ax, components, field_name, text_size,
+                                     plot_min_x, plot_max_x,
+                                     plot_min_y, plot_max_y)
+        else:
+            # 第二遍：批量绘制文本。背景白框集中为一个PatchCollection
+            # 一次性加入坐标系，不再让每个标签各自解析boxstyle并新建patch
+            self._draw_labels_batched(ax, components, field_name, text_size,
+                                      plot_max_x - plot_min_x,
+                                      plot_max_y - plot_min_y)
 
-        # 获取坐标边界
-        x_coords = [comp.x for comp in components]
-        y_coords = [comp.y for comp in components]
+        # 添加图例和信息
+        self._add_legend_and_info(ax, components, field_name)
 
-        min_x, max_x = min(x_coords), max(x_coords)
-        min_y, max_y = min(y_coords), max(y_coords)
+        fig.tight_layout()
+        return fig
+
+    def _compute_layout(self, components: List[Component]) -> dict:
+        """计算一层元器件的几何布局，并按层缓存
+
+        坐标边界、最小间距、统一文字大小和封装尺寸只取决于元器件
+        位置，与图纸类型无关；同一份components列表再次进来（编号/
+        封装/值图共享解析结果）时直接命中缓存，省掉三分之二的
+        几何计算。缓存持有列表引用，id不会被复用。
+        """
+        layout = self._layout_cache.get(id(components))
+        if layout is not None and layout['components'] is components:
+            return layout
+
+        # 坐标一次性装进numpy数组，min/max各一趟C循环完成，
+        # 数组随后还复用于最小间距计算
+        xy = np.empty((len(components), 2), dtype=np.float64)
+        for i, comp in enumerate(components):
+            xy[i, 0] = comp.x
+            xy[i, 1] = comp.y
+        min_x, min_y = xy.min(0)
+        max_x, max_y = xy.max(0)
 
         # 添加边距
         x_range = max_x - min_x
@@ -100,51 +299,19 @@ class PDFGenerator:
         plot_min_y = min_y - margin_y
         plot_max_y = max_y + margin_y
 
-        # 创建图形
-        fig, ax = plt.subplots(figsize=self.figure_size)
-
-        # 设置坐标轴
-        ax.set_xlim(plot_min_x, plot_max_x)
-        ax.set_ylim(plot_min_y, plot_max_y)
-        ax.set_aspect('equal')
-        ax.grid(True, alpha=self.config.grid_alpha, linestyle='-', linewidth=0.5)
-        ax.set_xlabel('X (mm)', fontsize=10)
-        ax.set_ylabel('Y (mm)', fontsize=10)
-        ax.set_title(title, fontsize=14, fontweight='bold', pad=20)
-
-        # 添加次要网格
-        ax.grid(True, which='minor', alpha=self.config.grid_alpha * 0.5, linestyle=':', linewidth=0.3)
-        ax.minorticks_on()
-
-        # 计算统一的文字大小
-        text_size = self._calculate_optimal_text_size(components, plot_max_x - plot_min_x, plot_max_y - plot_min_y)
-
-        # 初始化文本位置跟踪
-        self.text_positions = []
-        self.component_bounds = []
+        # 统一文字大小（复用已构建的坐标数组）
+        text_size = self._calculate_optimal_text_size(
+            components, plot_max_x - plot_min_x, plot_max_y - plot_min_y, xy=xy)
 
-        # 第一遍：收集所有元器件边界
-        for comp in components:
-            package_size = self._get_package_size(comp.package)
-            bounds = {
-                'x': comp.x,
-                'y': comp.y,
-                'width': package_size[0],
-                'height': package_size[1],
-                'component': comp
-            }
-            self.component_bounds.append(bounds)
-
-        # 第二遍：绘制元器件和文本
-        for comp in components:
-            self._draw_component_with_smart_layout(ax, comp, field_name, text_size)
-
-        # 添加图例和信息
-        self._add_legend_and_info(ax, components, field_name)
+        layout = {
+            'components': components,
+            'xy': xy,
+            'extents': (plot_min_x, plot_max_x, plot_min_y, plot_max_y),
+            'text_size': text_size,
+        }
+        self._layout_cache[id(components)] = layout
+        return layout
 
-        plt.tight_layout()
-        return fig
-    
     def _draw_component(self, ax, component: Component, field_name: str, text_size: float):
         """绘制单个元器件"""
         x, y = component.x, component.y
@@ -163,9 +330,6 @@ class PDFGenerator:
         package_size = self._get_package_size(component.package)
         width, height = package_size
 
-        # 根据角度旋转
-        angle_rad = math.radians(component.orientation)
-
         # 创建矩形
         rect = patches.Rectangle(
             (x - width/2, y - height/2),
@@ -186,10 +350,7 @@ class PDFGenerator:
                fontsize=text_size,
                ha='center', va='center',
                rotation=self._get_text_rotation(component.orientation),
-               bbox=dict(boxstyle='round,pad=0.2',
-                        facecolor=self.config.text_background_color,
-                        alpha=self.config.text_background_alpha,
-                        edgecolor='none'),
+               bbox=self._text_bbox_style,
                clip_on=True,
                zorder=10)  # 确保文本在最上层
 
@@ -256,10 +417,7 @@ class PDFGenerator:
                fontsize=text_size,
                ha='center', va='center',
                rotation=self._get_text_rotation(component.orientation),
-               bbox=dict(boxstyle='round,pad=0.2',
-                        facecolor=self.config.text_background_color,
-                        alpha=self.config.text_background_alpha,
-                        edgecolor='none'),
+               bbox=self._text_bbox_style,
                clip_on=True,
                zorder=10)
 
@@ -307,21 +465,140 @@ class PDFGenerator:
 
     def _is_text_overlapping(self, x: float, y: float, width: float, height: float) -> bool:
         """检查文本是否与已有文本重叠"""
-        for pos_x, pos_y, pos_width, pos_height in self.text_positions:
-            # 检查矩形重叠
-            if (abs(x - pos_x) < (width + pos_width) / 2 and
-                abs(y - pos_y) < (height + pos_height) / 2):
-                return True
-        return False
+        # 对整块位置数组做一次向量化矩形判断，代替逐框解包比较
+        a = self._positions_arr[:self._pos_n]
+        return bool(((np.abs(x - a[:, 0]) < (width + a[:, 2]) / 2) &
+                     (np.abs(y - a[:, 1]) < (height + a[:, 3]) / 2)).any())
 
     def _record_text_position(self, x: float, y: float, text: str, text_size: float):
         """记录文本位置"""
-        char_width = text_size * 0.55  # Arial Narrow字符宽度
-        char_height = text_size
-        text_width = len(text) * char_width
-        text_height = char_height
-
-        self.text_positions.append((x, y, text_width, text_height))
+        text_width = _text_width(text, text_size)
+        text_height = text_size
+
+        # 追加记录并按外扩后的包围盒登记进网格索引。外扩量取
+        # _rectangles_overlap缓冲区的上界（缓冲区不超过任一参与
+        # 矩形的max(0.3, 最短边*0.5)），保证索引剪枝不漏判
+        index = self._pos_n
+        self._pos_n = index + 1
+        if index >= len(self._positions_arr):
+            grown = np.empty((len(self._positions_arr) * 2, 4), dtype=np.float64)
+            grown[:index] = self._positions_arr
+            self._positions_arr = grown
+        self._positions_arr[index] = (x, y, text_width, text_height)
+        margin = max(0.3, min(text_width, text_height) * 0.5)
+        for cell in self._grid_cells(x, y, text_width + 2 * margin,
+                                     text_height + 2 * margin):
+            self._text_grid.setdefault(cell, []).append(index)
+
+    def _get_label_text(self, component: Component, field_name: str) -> str:
+        """按图纸类型取元器件要显示的文本"""
+        return _FIELD_GETTERS.get(field_name, _FIELD_GETTERS['refdes'])(component)
+
+    def _draw_labels_batched(self, ax, components: List[Component],
+                             field_name: str, text_size: float,
+                             span_x: float, span_y: float):
+        """批量绘制文字标记，只显示文字不画轮廓
+
+        逐文本的bbox=dict(...)让matplotlib为每个标签单独解析
+        boxstyle、构建并绘制一个patch，是批量渲染的主要开销；
+        这里把所有背景框按估算的文本尺寸收进一个PatchCollection，
+        字形本身仍逐个ax.text（matplotlib没有文本集合类型）。
+        """
+        # 点数到数据坐标的换算：等比例坐标轴下取更受限的一维
+        avail_x = self.figure_size[0] * 0.9 * 72
+        avail_y = self.figure_size[1] * 0.9 * 72
+        data_per_pt = max(span_x / avail_x, span_y / avail_y)
+
+        box_height = text_size * 1.2 * data_per_pt
+        pad = text_size * 0.1 * data_per_pt
+
+        # 文本旋转角整列向量化（与_get_text_rotation逐个计算等价）
+        angles = np.fromiter((c.orientation for c in components),
+                             np.float64, len(components)) % 360
+        rotations = np.where((angles >= 90) & (angles <= 270),
+                             angles - 180, angles)
+
+        # 取值函数在循环外查一次，循环体只剩一次属性/函数调用
+        get_text = _FIELD_GETTERS.get(field_name, _FIELD_GETTERS['refdes'])
+
+        rects = []
+        for comp, rotation in zip(components, rotations):
+            text = get_text(comp)
+            width = _text_width(text, text_size) * data_per_pt + 2 * pad
+            height = box_height + 2 * pad
+            rects.append(patches.Rectangle(
+                (comp.x - width / 2, comp.y - height / 2), width, height,
+                angle=rotation, rotation_point='center'))
+
+            ax.text(comp.x, comp.y, text,
+                    fontsize=text_size,
+                    ha='center', va='center',
+                    rotation=rotation,
+                    clip_on=True,
+                    zorder=10,
+                    weight='bold')  # 加粗字体提高可读性
+
+            # 记录文本位置用于重叠检测
+            self._record_text_position(comp.x, comp.y, text, text_size)
+
+        ax.add_collection(PatchCollection(
+            rects, facecolor='white', alpha=0.9,
+            edgecolor='black', linewidths=0.2, zorder=9))
+
+    def _draw_labels_raster(self, ax, components: List[Component],
+                            field_name: str, text_size: float,
+                            x0: float, x1: float, y0: float, y1: float):
+        """把整层标签栅格化为一张RGBA位图并用一次imshow放入图中
+
+        标签数超过raster_threshold后，逐标签的矢量文本（每个都要
+        参与布局、坐标变换和PDF流输出）成为渲染瓶颈；改为离屏
+        按输出dpi把文本和白底框画进一个PIL位图，整层只剩一个
+        图元，输出文件也随标签数不再线性膨胀。位图模式下不做
+        旋转和重叠规避：密集板上标签本就紧贴元器件坐标。
+        """
+        from PIL import Image, ImageDraw, ImageFont
+        from matplotlib import font_manager
+
+        # 数据单位→像素的换算与矢量路径一致（见_draw_labels_batched）
+        span_x = x1 - x0
+        span_y = y1 - y0
+        avail_x = self.figure_size[0] * 0.9 * 72
+        avail_y = self.figure_size[1] * 0.9 * 72
+        data_per_pt = max(span_x / avail_x, span_y / avail_y)
+        px_per_data = self.dpi / (72.0 * data_per_pt)
+        img_w = max(1, round(span_x * px_per_data))
+        img_h = max(1, round(span_y * px_per_data))
+
+        try:
+            font = ImageFont.truetype(font_manager.findfont(_LABEL_FONT),
+                                      max(1, round(text_size * self.dpi / 72)))
+        except OSError:
+            font = ImageFont.load_default()
+
+        img = Image.new('RGBA', (img_w, img_h), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(img)
+        get_text = _FIELD_GETTERS.get(field_name, _FIELD_GETTERS['refdes'])
+
+        # 同名标签的包围盒只量一次（值/封装图重复率很高）
+        bbox_cache = {}
+        for comp in components:
+            text = get_text(comp)
+            box = bbox_cache.get(text)
+            if box is None:
+                box = bbox_cache[text] = draw.textbbox((0, 0), text, font=font)
+            w = box[2] - box[0]
+            h = box[3] - box[1]
+            px = (comp.x - x0) * px_per_data
+            py = (y1 - comp.y) * px_per_data  # 位图y轴向下
+            draw.rectangle((px - w / 2 - 1, py - h / 2 - 1,
+                            px + w / 2 + 1, py + h / 2 + 1),
+                           fill=(255, 255, 255, 230), outline=(0, 0, 0, 255))
+            draw.text((px - w / 2 - box[0], py - h / 2 - box[1]),
+                      text, font=font, fill=(0, 0, 0, 255))
+
+        # origin='upper'：位图首行对应y1（上边缘），与PIL坐标一致
+        ax.imshow(np.asarray(img), extent=(x0, x1, y0, y1),
+                  origin='upper', interpolation='nearest', zorder=10)
 
     def _draw_component_with_smart_layout(self, ax, component: Component, field_name: str, text_size: float):
         """使用智能布局绘制元器件，只显示文字标记"""
@@ -345,11 +622,7 @@ class PDFGenerator:
                fontsize=text_size,
                ha='center', va='center',
                rotation=self._get_text_rotation(component.orientation),
-               bbox=dict(boxstyle='round,pad=0.05',  # 减小padding
-                        facecolor='white',
-                        alpha=0.9,  # 增加不透明度确保可读性
-                        edgecolor='black',
-                        linewidth=0.2),
+               bbox=self._label_bbox_style,
                clip_on=True,
                zorder=10,
                weight='bold')  # 加粗字体提高可读性
@@ -360,11 +633,9 @@ class PDFGenerator:
     def _find_optimal_text_position(self, x: float, y: float, text: str,
                                    text_size: float, comp_width: float, comp_height: float) -> Tuple[float, float]:
         """寻找最优的文本位置，优先使用原始坐标"""
-        # 估算文本尺寸（针对Arial Narrow优化）
-        char_width = text_size * 0.55  # Arial Narrow字符宽度更窄
-        char_height = text_size * 1.0  # 字符高度
-        text_width = len(text) * char_width
-        text_height = char_height
+        # 按实际字形测量文本宽度（带缓存），窄文本保留框更小
+        text_width = _text_width(text, text_size)
+        text_height = text_size
 
         # 首先检查原始位置是否可用
         if not self._is_position_occupied(x, y, text_width, text_height):
@@ -405,14 +676,53 @@ class PDFGenerator:
         # 如果所有位置都被占用，使用螺旋搜索
         return self._spiral_search_position(x, y, text_width, text_height, min_offset, min_offset)
 
-    def _is_position_occupied(self, x: float, y: float, width: float, height: float) -> bool:
-        """检查位置是否被占用（只检查与其他文本的重叠）"""
-        # 只检查与已有文本的重叠，不再检查元器件轮廓
-        for pos_x, pos_y, pos_width, pos_height in self.text_positions:
-            if self._rectangles_overlap(x, y, width, height, pos_x, pos_y, pos_width, pos_height):
-                return True
+    def _grid_cells(self, x: float, y: float, width: float, height: float):
+        """枚举矩形（中心x,y，宽高width,height）覆盖的网格格子"""
+        c = self._grid_cell
+        x0 = int((x - width / 2) // c)
+        x1 = int((x + width / 2) // c)
+        y0 = int((y - height / 2) // c)
+        y1 = int((y + height / 2) // c)
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                yield (cx, cy)
 
-        return False
+    def _is_position_occupied(self, x: float, y: float, width: float, height: float) -> bool:
+        """检查位置是否被占用（只检查与其他文本的重叠）
+
+        先用网格索引圈出候选（登记时文本框已按重叠缓冲区外扩，
+        所以任何可能重叠的框必与候选框共享格子），再对命中的少数
+        候选做精确矩形判断；整体从O(已放置数)降到O(邻近数)。
+        """
+        seen = set()
+        for cell in self._grid_cells(x, y, width, height):
+            seen.update(self._text_grid.get(cell, ()))
+        if not seen:
+            return False
+
+        # 候选整批做精确判断：一次numpy表达式代替逐候选的
+        # Python比较链，语义与_rectangles_overlap逐对判断一致
+        cand = self._positions_arr[np.fromiter(seen, dtype=np.intp, count=len(seen))]
+        dx = np.abs(x - cand[:, 0])
+        dy = np.abs(y - cand[:, 1])
+
+        # 廉价的L1远距离预筛：带缓冲重叠要求dx+dy < 四边和/2 + 2倍
+        # 缓冲区，而缓冲区不超过max(0.3, 四边和/4)，故dx+dy超过
+        # 四边和+0.6的候选必不重叠；先一轮加法比较剔除，带乘法的
+        # 缓冲区精确判断只对幸存的少数做
+        near = (dx + dy) < (width + height + cand[:, 2] + cand[:, 3]) + 0.6
+        if not near.any():
+            return False
+        cand = cand[near]
+        dx = dx[near]
+        dy = dy[near]
+
+        buffer = np.maximum(
+            0.3, np.minimum(min(width, height),
+                            np.minimum(cand[:, 2], cand[:, 3])) * 0.5)
+        hit = ((dx < (width + cand[:, 2]) / 2 + buffer) &
+               (dy < (height + cand[:, 3]) / 2 + buffer))
+        return bool(hit.any())
 
     def _rectangles_overlap(self, x1: float, y1: float, w1: float, h1: float,
                            x2: float, y2: float, w2: float, h2: float) -> bool:
@@ -434,18 +744,26 @@ class PDFGenerator:
         max_radius = max(comp_width, comp_height) * 5
         step = min(text_width, text_height) / 3
 
-        # 更密集的角度搜索
-        for radius in np.arange(step, max_radius, step):
-            for angle in np.arange(0, 2 * np.pi, np.pi / 12):  # 更多角度
-                test_x = center_x + radius * np.cos(angle)
-                test_y = center_y + radius * np.sin(angle)
-
-                if not self._is_position_occupied(test_x, test_y, text_width, text_height):
-                    return (test_x, test_y)
+        # 候选偏移从缓存表整批取出（半径从小到大、角度序与原
+        # 实现一致），不再在热路径里反复np.arange和逐点算三角函数
+        dx, dy = self._spiral_offsets(step, max_radius)
+        for test_x, test_y in zip(center_x + dx, center_y + dy):
+            if not self._is_position_occupied(test_x, test_y, text_width, text_height):
+                return (test_x, test_y)
 
         # 如果螺旋搜索失败，尝试网格搜索
         return self._grid_search_position(center_x, center_y, text_width, text_height, max_radius)
 
+    def _spiral_offsets(self, step: float, max_radius: float):
+        """懒构建并缓存螺旋搜索的(dx, dy)偏移表"""
+        key = (step, max_radius)
+        if self._spiral_cache_key != key:
+            radii = np.arange(step, max_radius, step)
+            self._spiral_cache = (np.outer(radii, _SPIRAL_COS).ravel(),
+                                  np.outer(radii, _SPIRAL_SIN).ravel())
+            self._spiral_cache_key = key
+        return self._spiral_cache
+
     def _grid_search_position(self, center_x: float, center_y: float,
                              text_width: float, text_height: float, max_radius: float) -> Tuple[float, float]:
         """网格搜索备用方案"""
@@ -462,36 +780,24 @@ class PDFGenerator:
         # 最后的备用方案：返回远离中心的位置
         return (center_x + max_radius, center_y + max_radius)
     
-    def _get_package_size(self, package: str) -> Tuple[float, float]:
-        """根据封装名称估算尺寸（毫米）"""
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _get_package_size(package: str) -> Tuple[float, float]:
+        """根据封装名称估算尺寸（毫米）
+
+        纯字符串函数，lru_cache按封装名记住结果：同一块板上封装
+        种类有限，每个名称只做一次小写化和子串扫描，后续全部
+        O(1)命中，不再每次绘制/收集边界都扫一遍映射表。
+        """
         package_lower = package.lower()
-        
-        # 常见封装尺寸映射
-        size_map = {
-            'c0201': (0.6, 0.3),
-            'c0402': (1.0, 0.5),
-            'c0603': (1.6, 0.8),
-            'c0805': (2.0, 1.25),
-            'c1206': (3.2, 1.6),
-            'r0201': (0.6, 0.3),
-            'r0402': (1.0, 0.5),
-            'r0603': (1.6, 0.8),
-            'r0805': (2.0, 1.25),
-            'r1206': (3.2, 1.6),
-            'sot23': (2.9, 1.3),
-            'sot23-5': (2.9, 1.6),
-            'sot23-6': (2.9, 1.6),
-            'sop8': (5.0, 4.0),
-            'qfn': (5.0, 5.0),
-            'qfn16': (3.0, 3.0),
-            'qfn48': (7.0, 7.0),
-            'qfn64': (9.0, 9.0),
-            'usb': (12.0, 8.0),
-            'hdmi': (15.0, 12.0),
-        }
-        
-        # 查找匹配的封装
-        for key, size in size_map.items():
+
+        # 精确命中直接走一次哈希查找
+        size = _PACKAGE_SIZE_MAP.get(package_lower)
+        if size is not None:
+            return size
+
+        # 未命中再做子串匹配（如'C0402_CUSTOM'仍能对上'c0402'）
+        for key, size in _PACKAGE_SIZE_MAP.items():
             if key in package_lower:
                 return size
         
@@ -509,7 +815,8 @@ class PDFGenerator:
         else:
             return angle
     
-    def _calculate_optimal_text_size(self, components: List[Component], width: float, height: float) -> float:
+    def _calculate_optimal_text_size(self, components: List[Component], width: float, height: float,
+                                     xy: Optional[np.ndarray] = None) -> float:
         """基于0201封装尺寸计算最优文字大小"""
         if not components:
             return 2.0  # 默认很小的字体
@@ -528,16 +835,27 @@ class PDFGenerator:
         # 但这太小了，我们需要在可读性和避免重叠之间平衡
         # 使用0201封装作为基准，但允许适当放大
 
+        # 基于0201封装的字体大小（放大2.5倍平衡可读性和重叠）
+        package_based_size = max_text_height_mm * 2.83 * 2.5  # ≈ 1.7pt
+
+        # 早退1：最终结果不会超过package_based_size（取min），
+        # 它已不高于下限钳位值时结果必为下限，整个最近对扫描
+        # 可以跳过（当前常数组合下恒如此）
+        if package_based_size <= 2.5:
+            return 2.5
+
+        # 早退2：均匀间距估计是最小间距的上界的廉价近似，
+        # 由它推出的字号已触到下限时同样无需精确扫描
+        if math.sqrt(width * height / len(components)) * 0.25 * 2.83 <= 2.5:
+            return 2.5
+
         # 计算最小元器件间距
-        min_distance = self._calculate_min_component_distance(components)
+        min_distance = self._calculate_min_component_distance(components, xy=xy)
 
         # 基于最小间距的字体大小限制
         # 文字高度不应超过最小间距的25%（更严格的限制）
         distance_based_size = (min_distance * 0.25) * 2.83
 
-        # 基于0201封装的字体大小（放大2.5倍平衡可读性和重叠）
-        package_based_size = max_text_height_mm * 2.83 * 2.5  # ≈ 1.7pt
-
         # 取两者中的较小值，确保既不重叠又基于0201尺寸
         optimal_size = min(distance_based_size, package_based_size)
 
@@ -549,22 +867,21 @@ class PDFGenerator:
 
         return optimal_size
 
-    def _calculate_min_component_distance(self, components: List[Component]) -> float:
+    def _calculate_min_component_distance(self, components: List[Component],
+                                          xy: Optional[np.ndarray] = None) -> float:
         """计算元器件之间的最小距离"""
         if len(components) < 2:
             return 5.0  # 默认间距
 
-        min_distance = float('inf')
-
-        for i in range(len(components)):
-            for j in range(i + 1, len(components)):
-                dist = ((components[i].x - components[j].x)**2 +
-                       (components[i].y - components[j].y)**2)**0.5
-                if dist > 0:
-                    min_distance = min(min_distance, dist)
+        # 坐标转成numpy数组（调用方已有现成数组时直接复用），
+        # 最近点对交给网格分桶搜索：广播全矩阵是O(N²)内存和
+        # 计算，大板子上无法接受
+        if xy is None:
+            xy = np.asarray([(c.x, c.y) for c in components], dtype=np.float64)
+        min_distance = _min_pairwise_distance(xy)
 
         # 如果没有找到有效距离，返回默认值
-        if min_distance == float('inf'):
+        if not math.isfinite(min_distance):
             return 5.0
 
         # 确保最小距离不会太小
@@ -590,7 +907,7 @@ class PDFGenerator:
                transform=ax.transAxes,
                fontsize=9,
                verticalalignment='top',
-               bbox=dict(boxstyle='round,pad=0.5', facecolor='lightyellow', alpha=0.8))
+               bbox=self._info_bbox_style)
 
 
 def test_generator():
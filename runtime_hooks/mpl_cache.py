@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+运行时钩子：将matplotlib缓存目录指向随包分发的字体缓存
+
+matplotlib首次导入时若找不到fontlist缓存，会扫描系统字体目录
+重建缓存，耗时1-3秒；onefile模式每次启动都解压到全新的临时目录，
+次次都要重建。构建时预转储的fontlist已放入包内matplotlib/目录，
+这里把MPLCONFIGDIR指过去即可直接命中，跳过整个字体扫描。
+"""
+
+import os
+import sys
+
+if not os.environ.get('MPLCONFIGDIR'):
+    base = getattr(sys, '_MEIPASS', os.path.dirname(sys.executable))
+    os.environ['MPLCONFIGDIR'] = os.path.join(base, 'matplotlib')
@@ -14,8 +14,8 @@ from pathlib import Path
 def check_python_version():
     """检查Python版本"""
     version = sys.version_info
-    if version.major < 3 or (version.major == 3 and version.minor < 8):
-        print(f"错误: 需要Python 3.8或更高版本，当前版本: {version.major}.{version.minor}.{version.micro}")
+    if version.major < 3 or (version.major == 3 and version.minor < 10):
+        print(f"错误: 需要Python 3.10或更高版本，当前版本: {version.major}.{version.minor}.{version.micro}")
         return False
     
     print(f"Python版本检查通过: {version.major}.{version.minor}.{version.micro}")
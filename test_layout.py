@@ -5,51 +5,77 @@
 创建密集排列的元器件来测试文字重叠避免算法
 """
 
-import csv
+import hashlib
+import tempfile
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from csv_parser import CSVParser
 from pdf_generator import PDFGenerator
 from config import Config
 
 
-def create_dense_test_csv():
-    """创建密集排列的测试CSV文件"""
-    test_data = [
-        ['Num', 'RefDes', 'PartDecal', 'X', 'Y', 'Layer', 'Orient.', 'value']
-    ]
-    
-    # 创建密集的网格布局
-    component_id = 1
-    for x in range(0, 50, 5):  # X坐标：0, 5, 10, ..., 45
-        for y in range(0, 30, 3):  # Y坐标：0, 3, 6, ..., 27
-            layer = 'Top' if (x + y) % 2 == 0 else 'Bottom'
-            
-            # 不同类型的元器件
-            if component_id % 3 == 0:
-                refdes = f'C{component_id}'
-                package = 'C0603'
-                value = '10uF'
-            elif component_id % 3 == 1:
-                refdes = f'R{component_id}'
-                package = 'R0402'
-                value = '1K'
-            else:
-                refdes = f'U{component_id}'
-                package = 'QFN48'
-                value = 'IC'
-            
-            test_data.append([
-                component_id, refdes, package, x, y, layer, 0, value
-            ])
-            component_id += 1
-    
-    # 保存到CSV文件
-    with open('dense_test.csv', 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerows(test_data)
-    
-    print(f"创建了包含 {component_id-1} 个元器件的密集测试文件: dense_test.csv")
-    return 'dense_test.csv'
+# 两个测试共用同一个配置和生成器：PDFGenerator初始化会设置
+# matplotlib字体参数，没必要做两遍；每张图的文本索引等状态
+# 在_create_layout_figure内部自行重建，复用实例是安全的
+_generator = None
+
+
+def _get_generator():
+    """返回共享的PDFGenerator实例（首次调用时构建）"""
+    global _generator
+    if _generator is None:
+        _generator = PDFGenerator(Config())
+    return _generator
+
+
+# 解析结果按文件内容哈希缓存：两个现有fixture内容不同、各解析
+# 一次，但重复调用同一fixture的测试（或未来新增的）直接复用；
+# 返回同一份components对象还能命中PDFGenerator的按层布局缓存
+_parse_cache = {}
+
+
+def _parse_csv_cached(csv_file: Path):
+    """解析CSV并按内容哈希缓存，返回(解析器, components字典)"""
+    digest = hashlib.sha256(Path(csv_file).read_bytes()).hexdigest()
+    cached = _parse_cache.get(digest)
+    if cached is None:
+        parser = CSVParser()
+        cached = (parser, parser.parse_file(csv_file))
+        _parse_cache[digest] = cached
+    return cached
+
+
+def create_dense_test_csv(directory: Path):
+    """在directory下创建密集排列的测试CSV文件"""
+    # 密集网格布局整体向量化：坐标用meshgrid生成，层和元器件
+    # 类型按取模一次性选出，不再逐格走Python分支
+    xs, ys = np.meshgrid(np.arange(0, 50, 5),   # X坐标：0, 5, 10, ..., 45
+                         np.arange(0, 30, 3),   # Y坐标：0, 3, 6, ..., 27
+                         indexing='ij')
+    xs = xs.ravel()
+    ys = ys.ravel()
+    ids = np.arange(1, xs.size + 1)
+
+    layers = np.where((xs + ys) % 2 == 0, 'Top', 'Bottom')
+
+    # 不同类型的元器件（按编号取模轮换）
+    kind = ids % 3
+    refdes = np.char.add(np.choose(kind, ['C', 'R', 'U']), ids.astype(str))
+    packages = np.choose(kind, ['C0603', 'R0402', 'QFN48'])
+    values = np.choose(kind, ['10uF', '1K', 'IC'])
+
+    # 字段都不含分隔符，整表拼成文本一次写盘
+    rows = np.column_stack((ids.astype(str), refdes, packages,
+                            xs.astype(str), ys.astype(str), layers,
+                            np.full(ids.size, '0'), values))
+    content = 'Num,RefDes,PartDecal,X,Y,Layer,Orient.,value\n'
+    content += '\n'.join(map(','.join, rows.tolist())) + '\n'
+    csv_path = directory / 'dense_test.csv'
+    csv_path.write_text(content, encoding='utf-8')
+
+    print(f"创建了包含 {ids.size} 个元器件的密集测试文件: {csv_path}")
+    return csv_path
 
 
 def test_layout_algorithm():
@@ -57,13 +83,14 @@ def test_layout_algorithm():
     print("布局算法测试")
     print("=" * 50)
     
-    # 创建测试文件
-    csv_file = create_dense_test_csv()
-    
-    # 解析CSV
-    parser = CSVParser()
-    components = parser.parse_file(csv_file)
-    
+    # 测试文件放在临时目录：with退出时整体清理，测试中途崩溃
+    # 也不会把fixture残留在工作目录里
+    with tempfile.TemporaryDirectory() as td:
+        csv_file = create_dense_test_csv(Path(td))
+
+        # 解析CSV（按内容哈希缓存）
+        parser, components = _parse_csv_cached(csv_file)
+
     stats = parser.get_statistics()
     print(f"解析结果: {stats}")
     
@@ -72,9 +99,8 @@ def test_layout_algorithm():
     output_dir.mkdir(exist_ok=True)
     
     # 生成PDF
-    config = Config()
-    generator = PDFGenerator(config)
-    
+    generator = _get_generator()
+
     print("正在生成测试PDF...")
     generator.generate_refdes_pdf(components, output_dir)
     
@@ -82,35 +108,36 @@ def test_layout_algorithm():
     print(f"生成的文件:")
     for pdf_file in output_dir.glob('*.pdf'):
         print(f"  {pdf_file}")
-    
-    # 清理测试文件
-    Path(csv_file).unlink()
-
-
-def create_overlap_test_csv():
-    """创建重叠测试CSV文件"""
-    test_data = [
-        ['Num', 'RefDes', 'PartDecal', 'X', 'Y', 'Layer', 'Orient.', 'value'],
-        # 在同一位置放置多个元器件（测试极端情况）
-        [1, 'C1', 'C0603', 10.0, 10.0, 'Top', 0, '10uF'],
-        [2, 'C2', 'C0603', 10.1, 10.1, 'Top', 0, '22uF'],
-        [3, 'C3', 'C0603', 10.2, 10.2, 'Top', 0, '100nF'],
-        [4, 'R1', 'R0402', 10.0, 10.5, 'Top', 0, '1K'],
-        [5, 'R2', 'R0402', 10.5, 10.0, 'Top', 0, '2.2K'],
-        [6, 'U1', 'QFN48', 15.0, 15.0, 'Top', 0, 'MCU'],
-        [7, 'U2', 'QFN48', 15.1, 15.1, 'Top', 0, 'FPGA'],
-        # 添加一些正常间距的元器件作为对比
-        [8, 'C10', 'C0603', 30.0, 30.0, 'Top', 0, '10uF'],
-        [9, 'R10', 'R0402', 40.0, 40.0, 'Top', 0, '1K'],
-        [10, 'U10', 'QFN48', 50.0, 50.0, 'Top', 0, 'IC'],
-    ]
-    
-    with open('overlap_test.csv', 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerows(test_data)
-    
-    print("创建了重叠测试文件: overlap_test.csv")
-    return 'overlap_test.csv'
+
+
+# 重叠测试固定数据：字段无需引号转义，直接以常量文本整块写盘，
+# 免去csv.writer逐行的方言/引号处理
+_OVERLAP_TEST_CSV = """\
+Num,RefDes,PartDecal,X,Y,Layer,Orient.,value
+1,C1,C0603,10.0,10.0,Top,0,10uF
+2,C2,C0603,10.1,10.1,Top,0,22uF
+3,C3,C0603,10.2,10.2,Top,0,100nF
+4,R1,R0402,10.0,10.5,Top,0,1K
+5,R2,R0402,10.5,10.0,Top,0,2.2K
+6,U1,QFN48,15.0,15.0,Top,0,MCU
+7,U2,QFN48,15.1,15.1,Top,0,FPGA
+8,C10,C0603,30.0,30.0,Top,0,10uF
+9,R10,R0402,40.0,40.0,Top,0,1K
+10,U10,QFN48,50.0,50.0,Top,0,IC
+"""
+
+
+def create_overlap_test_csv(directory: Path):
+    """在directory下创建重叠测试CSV文件
+
+    前7行在近乎同一位置堆叠多个元器件（测试极端情况），
+    后3行是正常间距的对比样本。
+    """
+    csv_path = directory / 'overlap_test.csv'
+    csv_path.write_text(_OVERLAP_TEST_CSV, encoding='utf-8')
+
+    print(f"创建了重叠测试文件: {csv_path}")
+    return csv_path
 
 
 def test_overlap_handling():
@@ -118,33 +145,33 @@ def test_overlap_handling():
     print("\n重叠处理测试")
     print("=" * 50)
     
-    # 创建测试文件
-    csv_file = create_overlap_test_csv()
-    
-    # 解析CSV
-    parser = CSVParser()
-    components = parser.parse_file(csv_file)
-    
+    # 测试文件同样放进自动清理的临时目录
+    with tempfile.TemporaryDirectory() as td:
+        csv_file = create_overlap_test_csv(Path(td))
+
+        # 解析CSV（按内容哈希缓存）
+        parser, components = _parse_csv_cached(csv_file)
+
     # 创建输出目录
     output_dir = Path('overlap_test_output')
     output_dir.mkdir(exist_ok=True)
     
-    # 生成PDF
-    config = Config()
-    generator = PDFGenerator(config)
-    
+    # 三类图相互独立、输出文件不同，并行生成。与主程序一致：
+    # 每个工作线程用自己的PDFGenerator实例，文本位置索引等
+    # 每图状态不跨线程共享
     print("正在生成重叠测试PDF...")
-    generator.generate_refdes_pdf(components, output_dir)
-    generator.generate_package_pdf(components, output_dir)
-    generator.generate_value_pdf(components, output_dir)
+    methods = ('generate_refdes_pdf', 'generate_package_pdf', 'generate_value_pdf')
+    with ThreadPoolExecutor(max_workers=len(methods)) as executor:
+        futures = [executor.submit(getattr(PDFGenerator(Config()), m),
+                                   components, output_dir)
+                   for m in methods]
+        for future in futures:
+            future.result()
     
     print("重叠测试完成！")
     print(f"生成的文件:")
     for pdf_file in output_dir.glob('*.pdf'):
         print(f"  {pdf_file}")
-    
-    # 清理测试文件
-    Path(csv_file).unlink()
 
 
 def main():